@@ -0,0 +1,137 @@
+"""
+Shared fixtures for the backend API test suite.
+
+Login is rate limited server-side (10 attempts/min per IP), so role sessions
+are created once per test session and reused by every test that needs them.
+"""
+import pytest
+import requests
+import os
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Test credentials
+SUPER_ADMIN_CREDS = {
+    "schoolCode": "SUPERADMIN",
+    "email": "superadmin@safal.com",
+    "password": "SuperAdmin@123"
+}
+
+PRINCIPAL_CREDS = {
+    "schoolCode": "TESTSCHOOL",
+    "email": "principal@testschool.com",
+    "password": "Principal@123"
+}
+
+
+def _backend_down_reason(base_url):
+    """Return why the backend at base_url is unreachable, or None if it answers"""
+    # A degraded (503) health response still counts as up, so that the
+    # health tests themselves report it instead of being skipped
+    try:
+        requests.get(f"{base_url}/api/health", timeout=5)
+    except requests.RequestException as exc:
+        return f"Backend unreachable at {base_url}: {exc}"
+    return None
+
+
+@pytest.fixture(scope="session", autouse=True)
+def backend_reachable():
+    """Probe REACT_APP_BACKEND_URL once and skip every test if it is unreachable"""
+    if not BASE_URL:
+        return
+    reason = _backend_down_reason(BASE_URL)
+    if reason:
+        pytest.skip(reason)
+
+
+def _login_session(adapter, creds, role, on_failure=pytest.skip):
+    """Login once and return a requests.Session carrying the bearer token"""
+    session = requests.Session()
+    session.mount(BASE_URL, adapter)
+    # Set once so bodies can be sent pre-serialized via data= on every call
+    session.headers.update({"Accept": "application/json", "Content-Type": "application/json"})
+    response = session.post(f"{BASE_URL}/api/auth/login", json=creds)
+    if response.status_code != 200:
+        on_failure(f"{role} login failed: {response.text}")
+    data = response.json()
+    session.headers.update({"Authorization": f"Bearer {data.get('token')}"})
+    session.token = data.get("token")
+    session.user = data.get("user")
+    return session
+
+
+@pytest.fixture(scope="session")
+def http_adapter():
+    """Pooled keep-alive connections to BASE_URL, shared by every role session"""
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.1)
+    )
+    yield adapter
+    adapter.close()
+
+
+@pytest.fixture(scope="session")
+def principal_session(http_adapter):
+    """Authenticated Principal session, shared by all tests"""
+    return _login_session(http_adapter, PRINCIPAL_CREDS, "Principal")
+
+
+@pytest.fixture(scope="session")
+def superadmin_session(http_adapter):
+    """Authenticated Super Admin session, shared by all tests"""
+    # Always seeded at server startup, so a failed login is a real failure
+    return _login_session(http_adapter, SUPER_ADMIN_CREDS, "Super Admin", on_failure=pytest.fail)
+
+
+
+def _get_or_create_school(session, code, name):
+    """Return the id of the test school with this code, creating it if needed"""
+    response = session.post(f"{BASE_URL}/api/superadmin/schools", json={"name": name, "code": code})
+    if response.status_code in [200, 201]:
+        return response.json()["id"]
+    # Left over from an earlier run: look it up by code. Backends without the
+    # ?code= filter return the full list, so match the code here as well
+    schools = session.get(f"{BASE_URL}/api/superadmin/schools", params={"code": code}).json()
+    return next((s["id"] for s in schools if s["code"] == code), None)
+
+
+@pytest.fixture(scope="session")
+def scaffolding(superadmin_session):
+    """One test school and wing, created once and shared by the wing and exam tests"""
+    school_id = _get_or_create_school(superadmin_session, "TESTWING", "TEST_Wing Test School")
+    if not school_id:
+        pytest.skip("Could not create test school")
+
+    wing_data = {
+        "tenantId": school_id,
+        "name": "exam_wing",
+        "displayName": "Exam Test Wing",
+        "grades": ["10", "11", "12"],
+        "sortOrder": 1
+    }
+    wing_response = superadmin_session.post(f"{BASE_URL}/api/superadmin/wings", json=wing_data)
+    if wing_response.status_code in [200, 201]:
+        wing_id = wing_response.json()["id"]
+    else:
+        wings = superadmin_session.get(f"{BASE_URL}/api/superadmin/wings?schoolId={school_id}").json()
+        wing_id = wings[0]["id"] if wings else None
+        if not wing_id:
+            pytest.skip("Could not create test wing")
+
+    return {"school_id": school_id, "wing_id": wing_id}
+
+
+@pytest.fixture(scope="session")
+def created_ids(superadmin_session):
+    """Ids created by the CRUD tests, by resource; whatever is left is deleted at session end"""
+    ids = {"schools": [], "wings": [], "exams": []}
+    yield ids
+    # Children before parents
+    for resource in ("exams", "wings", "schools"):
+        for item_id in ids[resource]:
+            superadmin_session.delete(f"{BASE_URL}/api/superadmin/{resource}/{item_id}")
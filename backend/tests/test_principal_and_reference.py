@@ -7,9 +7,29 @@ Tests:
 import pytest
 import requests
 import os
+import re
+import logging
+from types import SimpleNamespace
+import fastjsonschema
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
 
+# Static endpoint URLs, joined once at import
+URLS = SimpleNamespace(
+    login=f"{BASE_URL}/api/auth/login",
+    snapshot=f"{BASE_URL}/api/principal/snapshot",
+    grade_performance=f"{BASE_URL}/api/principal/grade-performance",
+    subject_health=f"{BASE_URL}/api/principal/subject-health",
+    at_risk=f"{BASE_URL}/api/principal/at-risk-students",
+    risk_alerts=f"{BASE_URL}/api/principal/risk-alerts",
+    ref_materials=f"{BASE_URL}/api/superadmin/reference-materials",
+)
+
+# Full response bodies are only rendered with --log-level=DEBUG
+logger = logging.getLogger(__name__)
+
 # Test credentials
 SUPER_ADMIN_CREDS = {
     "schoolCode": "SUPERADMIN",
@@ -24,23 +44,123 @@ PRINCIPAL_CREDS = {
 }
 
 
+def _list_of(*required):
+    """Schema for a (possibly empty) list of objects with the given keys"""
+    return {"type": "array", "items": {"type": "object", "required": list(required)}}
+
+
+# Expected response shapes, compiled once per module
+validate_snapshot = fastjsonschema.compile({
+    "type": "object",
+    "required": ["totalStudents", "testsThisMonth", "averageScore", "atRiskCount"],
+    "properties": {
+        "totalStudents": {"type": "integer"},
+        "testsThisMonth": {"type": "integer"},
+    },
+})
+validate_grade_performance = fastjsonschema.compile(
+    _list_of("grade", "averageScore", "passPercentage", "totalAttempts", "trend")
+)
+validate_subject_health = fastjsonschema.compile(_list_of("subject", "grade", "averagePercentage"))
+validate_at_risk_students = fastjsonschema.compile(_list_of("studentId", "studentName", "grade"))
+validate_risk_alerts = fastjsonschema.compile({"type": "array"})
+
+# Demo names that used to be hardcoded in the Principal dashboard
+HARDCODED_NAME_RE = re.compile(r"sharma|gupta", re.IGNORECASE)
+
+
+def response_json(response):
+    """Decode a response body with orjson instead of the stdlib json module"""
+    return orjson.loads(response.content)
+
+
 def get_auth_token(creds):
     """Helper to get auth token"""
-    response = requests.post(f"{BASE_URL}/api/auth/login", json=creds)
+    response = requests.post(URLS.login, json=creds)
     if response.status_code == 200:
-        return response.json().get("token")
+        return response_json(response).get("token")
     return None
 
 
+def get_reference_material(session, material_id):
+    """Fetch a single reference material instead of the whole list"""
+    return session.get(f"{URLS.ref_materials}/{material_id}")
+
+
+PRINCIPAL_DASHBOARD_URLS = {
+    "snapshot": URLS.snapshot,
+    "grade-performance": URLS.grade_performance,
+    "subject-health": URLS.subject_health,
+    "at-risk-students": URLS.at_risk,
+    "risk-alerts": URLS.risk_alerts,
+}
+
+
+@pytest.fixture(scope="class")
+def dashboard_responses(principal_session):
+    """Fetch all independent Principal dashboard endpoints concurrently"""
+    with ThreadPoolExecutor(max_workers=len(PRINCIPAL_DASHBOARD_URLS)) as executor:
+        responses = list(executor.map(principal_session.get, PRINCIPAL_DASHBOARD_URLS.values()))
+    return dict(zip(PRINCIPAL_DASHBOARD_URLS, responses))
+
+
+# One create case per allowed grade; each is created and read back
+NEW_MATERIAL_CASES = [
+    {
+        "title": "TEST_Math_Paper_2024",
+        "description": "Test math question paper for Class 10",
+        "grade": "10",
+        "subject": "Mathematics",
+        "category": "question_paper",
+        "academicYear": "2024-25",
+        "fileName": "test_math_paper.pdf",
+        "fileSize": 1024,
+        "mimeType": "application/pdf"
+    },
+    {
+        "title": "TEST_Physics_Paper_2024",
+        "description": "Test physics question paper for Class 12",
+        "grade": "12",
+        "subject": "Physics",
+        "category": "question_paper",
+        "academicYear": "2024-25",
+        "fileName": "test_physics_paper.pdf",
+        "fileSize": 2048,
+        "mimeType": "application/pdf"
+    },
+]
+
+
+@pytest.fixture(scope="class")
+def created_material(superadmin_session):
+    """Create one reference material shared by the update/delete tests"""
+    material_data = {
+        "title": "TEST_Chemistry_Paper_Original",
+        "grade": "10",
+        "subject": "Chemistry",
+        "category": "question_paper",
+        "fileName": "test_chem_paper.pdf"
+    }
+    response = superadmin_session.post(
+        URLS.ref_materials,
+        data=orjson.dumps(material_data)
+    )
+    assert response.status_code in [200, 201], f"Create failed: {response.text}"
+    material_id = response_json(response)["id"]
+    yield material_id
+    # Soft delete is idempotent enough for teardown; ignore the status
+    superadmin_session.delete(f"{URLS.ref_materials}/{material_id}")
+
+
 class TestAuthentication:
     """Test login for Super Admin and Principal"""
     
     def test_super_admin_login(self):
         """Super Admin should be able to login"""
-        response = requests.post(f"{BASE_URL}/api/auth/login", json=SUPER_ADMIN_CREDS)
+        response = requests.post(URLS.login, json=SUPER_ADMIN_CREDS)
         print(f"Super Admin login response: {response.status_code}")
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
-        data = response.json()
+        data = response_json(response)
         assert "user" in data, "Response should contain user"
         assert "token" in data, "Response should contain token"
         assert data["user"]["role"] == "super_admin", "User should be super_admin"
@@ -48,10 +168,10 @@ class TestAuthentication:
     
     def test_principal_login(self):
         """Principal should be able to login"""
-        response = requests.post(f"{BASE_URL}/api/auth/login", json=PRINCIPAL_CREDS)
+        response = requests.post(URLS.login, json=PRINCIPAL_CREDS)
         print(f"Principal login response: {response.status_code}")
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
-        data = response.json()
+        data = response_json(response)
         assert "user" in data, "Response should contain user"
         assert "token" in data, "Response should contain token"
         assert data["user"]["role"] == "principal", "User should be principal"
@@ -62,35 +182,23 @@ class TestPrincipalDashboard:
     """Test Principal Dashboard APIs - should return real data from database"""
     
     @pytest.fixture(autouse=True)
-    def setup(self):
-        """Login as principal before each test"""
-        response = requests.post(f"{BASE_URL}/api/auth/login", json=PRINCIPAL_CREDS)
-        if response.status_code != 200:
-            pytest.skip(f"Principal login failed: {response.text}")
-        data = response.json()
-        self.token = data.get("token")
-        self.user = data.get("user")
-        self.headers = {"Authorization": f"Bearer {self.token}"}
-        print(f"Logged in as Principal: {self.user.get('name')}")
+    def setup(self, principal_session, dashboard_responses):
+        """Reuse the session-scoped Principal login and prefetched dashboard responses"""
+        self.session = principal_session
+        self.user = principal_session.user
+        self.responses = dashboard_responses
     
     def test_principal_snapshot_api(self):
         """Test /api/principal/snapshot returns real data"""
-        response = requests.get(f"{BASE_URL}/api/principal/snapshot", headers=self.headers)
+        response = self.responses["snapshot"]
         print(f"Snapshot API response: {response.status_code}")
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
         
-        data = response.json()
-        print(f"Snapshot data: {data}")
-        
-        # Verify structure
-        assert "totalStudents" in data, "Should have totalStudents"
-        assert "testsThisMonth" in data, "Should have testsThisMonth"
-        assert "averageScore" in data, "Should have averageScore"
-        assert "atRiskCount" in data, "Should have atRiskCount"
+        data = response_json(response)
+        logger.debug("Snapshot data: %s", data)
         
-        # Verify data types
-        assert isinstance(data["totalStudents"], int), "totalStudents should be int"
-        assert isinstance(data["testsThisMonth"], int), "testsThisMonth should be int"
+        # Verify structure and data types
+        validate_snapshot(data)
         
         # According to task, test school has 2 students
         print(f"Total students in school: {data['totalStudents']}")
@@ -98,98 +206,69 @@ class TestPrincipalDashboard:
     
     def test_principal_grade_performance_api(self):
         """Test /api/principal/grade-performance returns real data"""
-        response = requests.get(f"{BASE_URL}/api/principal/grade-performance", headers=self.headers)
+        response = self.responses["grade-performance"]
         print(f"Grade Performance API response: {response.status_code}")
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
         
-        data = response.json()
-        print(f"Grade Performance data: {data}")
+        data = response_json(response)
+        logger.debug("Grade Performance data: %s", data)
         
         # Should be a list (can be empty if no exams yet)
-        assert isinstance(data, list), "Should return a list"
-        
-        # If data exists, verify structure
-        if len(data) > 0:
-            item = data[0]
-            assert "grade" in item, "Should have grade"
-            assert "averageScore" in item, "Should have averageScore"
-            assert "passPercentage" in item, "Should have passPercentage"
-            assert "totalAttempts" in item, "Should have totalAttempts"
-            assert "trend" in item, "Should have trend"
+        validate_grade_performance(data)
     
     def test_principal_subject_health_api(self):
         """Test /api/principal/subject-health returns real data"""
-        response = requests.get(f"{BASE_URL}/api/principal/subject-health", headers=self.headers)
+        response = self.responses["subject-health"]
         print(f"Subject Health API response: {response.status_code}")
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
         
-        data = response.json()
-        print(f"Subject Health data: {data}")
+        data = response_json(response)
+        logger.debug("Subject Health data: %s", data)
         
         # Should be a list (can be empty if no exams yet)
-        assert isinstance(data, list), "Should return a list"
-        
-        # If data exists, verify structure
-        if len(data) > 0:
-            item = data[0]
-            assert "subject" in item, "Should have subject"
-            assert "grade" in item, "Should have grade"
-            assert "averagePercentage" in item, "Should have averagePercentage"
+        validate_subject_health(data)
     
     def test_principal_at_risk_students_api(self):
         """Test /api/principal/at-risk-students returns real data"""
-        response = requests.get(f"{BASE_URL}/api/principal/at-risk-students", headers=self.headers)
+        response = self.responses["at-risk-students"]
         print(f"At-Risk Students API response: {response.status_code}")
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
         
-        data = response.json()
-        print(f"At-Risk Students data: {data}")
+        data = response_json(response)
+        logger.debug("At-Risk Students data: %s", data)
         
         # Should be a list (can be empty if no at-risk students)
-        assert isinstance(data, list), "Should return a list"
-        
-        # If data exists, verify structure
-        if len(data) > 0:
-            item = data[0]
-            assert "studentId" in item, "Should have studentId"
-            assert "studentName" in item, "Should have studentName"
-            assert "grade" in item, "Should have grade"
+        validate_at_risk_students(data)
     
     def test_principal_risk_alerts_api(self):
         """Test /api/principal/risk-alerts returns real data"""
-        response = requests.get(f"{BASE_URL}/api/principal/risk-alerts", headers=self.headers)
+        response = self.responses["risk-alerts"]
         print(f"Risk Alerts API response: {response.status_code}")
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
         
-        data = response.json()
-        print(f"Risk Alerts data: {data}")
+        data = response_json(response)
+        logger.debug("Risk Alerts data: %s", data)
         
         # Should be a list (can be empty if no alerts)
-        assert isinstance(data, list), "Should return a list"
+        validate_risk_alerts(data)
     
     def test_no_hardcoded_demo_data(self):
         """Verify no hardcoded names like 'Mr. Sharma' or 'Ms. Gupta' appear"""
         # Check at-risk students
-        response = requests.get(f"{BASE_URL}/api/principal/at-risk-students", headers=self.headers)
+        response = self.responses["at-risk-students"]
         assert response.status_code == 200
-        data = response.json()
+        data = response_json(response)
         
-        hardcoded_names = ["Mr. Sharma", "Ms. Gupta", "Sharma", "Gupta"]
-        
-        for student in data:
-            name = student.get("studentName", "")
-            for hardcoded in hardcoded_names:
-                assert hardcoded.lower() not in name.lower(), f"Found hardcoded name '{hardcoded}' in at-risk students"
+        offenders = [s["studentName"] for s in data if HARDCODED_NAME_RE.search(s.get("studentName") or "")]
+        assert not offenders, f"Found hardcoded names {offenders} in at-risk students"
         
         # Check risk alerts
-        response = requests.get(f"{BASE_URL}/api/principal/risk-alerts", headers=self.headers)
+        response = self.responses["risk-alerts"]
         assert response.status_code == 200
-        data = response.json()
+        data = response_json(response)
         
-        for alert in data:
-            name = alert.get("studentName", "")
-            for hardcoded in hardcoded_names:
-                assert hardcoded.lower() not in name.lower(), f"Found hardcoded name '{hardcoded}' in risk alerts"
+        offenders = [a["studentName"] for a in data if HARDCODED_NAME_RE.search(a.get("studentName") or "")]
+        assert not offenders, f"Found hardcoded names {offenders} in risk alerts"
         
         print("No hardcoded demo names found - data is from real database")
 
@@ -198,109 +277,52 @@ class TestReferenceMaterialsCRUD:
     """Test Reference Materials CRUD operations for Super Admin"""
     
     @pytest.fixture(autouse=True)
-    def setup(self):
-        """Login as super admin before each test"""
-        response = requests.post(f"{BASE_URL}/api/auth/login", json=SUPER_ADMIN_CREDS)
-        if response.status_code != 200:
-            pytest.skip(f"Super Admin login failed: {response.text}")
-        data = response.json()
-        self.token = data.get("token")
-        self.user = data.get("user")
-        self.headers = {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
-        print(f"Logged in as Super Admin: {self.user.get('name')}")
+    def setup(self, superadmin_session):
+        """Reuse the session-scoped Super Admin login"""
+        self.session = superadmin_session
+        self.user = superadmin_session.user
     
     def test_get_reference_materials_list(self):
         """Test GET /api/superadmin/reference-materials"""
-        response = requests.get(f"{BASE_URL}/api/superadmin/reference-materials", headers=self.headers)
+        response = self.session.get(URLS.ref_materials)
         print(f"Get Reference Materials response: {response.status_code}")
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
         
-        data = response.json()
+        data = response_json(response)
         assert isinstance(data, list), "Should return a list"
         print(f"Found {len(data)} reference materials")
     
-    def test_create_reference_material(self):
-        """Test POST /api/superadmin/reference-materials"""
-        material_data = {
-            "title": "TEST_Math_Paper_2024",
-            "description": "Test math question paper for Class 10",
-            "grade": "10",
-            "subject": "Mathematics",
-            "category": "question_paper",
-            "academicYear": "2024-25",
-            "fileName": "test_math_paper.pdf",
-            "fileSize": 1024,
-            "mimeType": "application/pdf"
-        }
-        
-        response = requests.post(
-            f"{BASE_URL}/api/superadmin/reference-materials",
-            json=material_data,
-            headers=self.headers
+    @pytest.mark.parametrize("material_data", NEW_MATERIAL_CASES, ids=lambda m: m["title"])
+    def test_create_reference_material(self, material_data):
+        """Test POST /api/superadmin/reference-materials and that the row persists"""
+        response = self.session.post(
+            URLS.ref_materials,
+            data=orjson.dumps(material_data)
         )
         print(f"Create Reference Material response: {response.status_code}")
         assert response.status_code in [200, 201], f"Expected 200/201, got {response.status_code}: {response.text}"
         
-        data = response.json()
+        data = response_json(response)
         assert "id" in data, "Response should contain id"
         assert data["title"] == material_data["title"], "Title should match"
         assert data["grade"] == material_data["grade"], "Grade should match"
-        print(f"Created reference material with ID: {data['id']}")
-        
-        return data["id"]
-    
-    def test_create_and_verify_persistence(self):
-        """Test that created material persists in database"""
-        # Create material
-        material_data = {
-            "title": "TEST_Physics_Paper_2024",
-            "description": "Test physics question paper for Class 12",
-            "grade": "12",
-            "subject": "Physics",
-            "category": "question_paper",
-            "academicYear": "2024-25",
-            "fileName": "test_physics_paper.pdf",
-            "fileSize": 2048,
-            "mimeType": "application/pdf"
-        }
-        
-        create_response = requests.post(
-            f"{BASE_URL}/api/superadmin/reference-materials",
-            json=material_data,
-            headers=self.headers
-        )
-        assert create_response.status_code in [200, 201], f"Create failed: {create_response.text}"
-        created = create_response.json()
-        material_id = created["id"]
+        material_id = data["id"]
+        print(f"Created reference material with ID: {material_id}")
         
-        # Verify by fetching list
-        list_response = requests.get(f"{BASE_URL}/api/superadmin/reference-materials", headers=self.headers)
-        assert list_response.status_code == 200
-        materials = list_response.json()
-        
-        found = any(m["id"] == material_id for m in materials)
-        assert found, f"Created material {material_id} not found in list"
+        # Verify by fetching the single material back
+        get_response = get_reference_material(self.session, material_id)
+        assert get_response.status_code == 200, f"Created material {material_id} not found: {get_response.text}"
+        assert response_json(get_response)["id"] == material_id
         print(f"Verified material {material_id} persisted in database")
     
-    def test_update_reference_material(self):
+    def test_get_unknown_reference_material_returns_404(self):
+        """Test GET /api/superadmin/reference-materials/:id for a missing id"""
+        response = get_reference_material(self.session, "00000000-0000-0000-0000-000000000000")
+        assert response.status_code == 404, f"Expected 404, got {response.status_code}: {response.text}"
+    
+    def test_update_reference_material(self, created_material):
         """Test PATCH /api/superadmin/reference-materials/:id"""
-        # First create a material
-        material_data = {
-            "title": "TEST_Chemistry_Paper_Original",
-            "grade": "10",
-            "subject": "Chemistry",
-            "category": "question_paper",
-            "fileName": "test_chem_paper.pdf"
-        }
-        
-        create_response = requests.post(
-            f"{BASE_URL}/api/superadmin/reference-materials",
-            json=material_data,
-            headers=self.headers
-        )
-        assert create_response.status_code in [200, 201]
-        created = create_response.json()
-        material_id = created["id"]
+        material_id = created_material
         
         # Update the material
         update_data = {
@@ -308,53 +330,32 @@ class TestReferenceMaterialsCRUD:
             "description": "Updated description"
         }
         
-        update_response = requests.patch(
-            f"{BASE_URL}/api/superadmin/reference-materials/{material_id}",
-            json=update_data,
-            headers=self.headers
+        update_response = self.session.patch(
+            f"{URLS.ref_materials}/{material_id}",
+            data=orjson.dumps(update_data)
         )
         print(f"Update Reference Material response: {update_response.status_code}")
         assert update_response.status_code == 200, f"Expected 200, got {update_response.status_code}: {update_response.text}"
         
-        updated = update_response.json()
+        updated = response_json(update_response)
         assert updated["title"] == update_data["title"], "Title should be updated"
         print(f"Updated material {material_id} successfully")
     
-    def test_delete_reference_material(self):
+    def test_delete_reference_material(self, created_material):
         """Test DELETE /api/superadmin/reference-materials/:id"""
-        # First create a material
-        material_data = {
-            "title": "TEST_Biology_Paper_ToDelete",
-            "grade": "12",
-            "subject": "Biology",
-            "category": "question_paper",
-            "fileName": "test_bio_paper.pdf"
-        }
-        
-        create_response = requests.post(
-            f"{BASE_URL}/api/superadmin/reference-materials",
-            json=material_data,
-            headers=self.headers
-        )
-        assert create_response.status_code in [200, 201]
-        created = create_response.json()
-        material_id = created["id"]
+        material_id = created_material
         
         # Delete the material
-        delete_response = requests.delete(
-            f"{BASE_URL}/api/superadmin/reference-materials/{material_id}",
-            headers=self.headers
+        delete_response = self.session.delete(
+            f"{URLS.ref_materials}/{material_id}"
         )
         print(f"Delete Reference Material response: {delete_response.status_code}")
         assert delete_response.status_code in [200, 204], f"Expected 200/204, got {delete_response.status_code}: {delete_response.text}"
         
-        # Verify deletion by checking list
-        list_response = requests.get(f"{BASE_URL}/api/superadmin/reference-materials", headers=self.headers)
+        # Material should not be in the active list the UI reads (soft delete)
+        list_response = self.session.get(URLS.ref_materials)
         assert list_response.status_code == 200
-        materials = list_response.json()
-        
-        # Material should not be in active list (soft delete)
-        found = any(m["id"] == material_id and m.get("isActive", True) for m in materials)
+        found = any(m["id"] == material_id and m.get("isActive", True) for m in response_json(list_response))
         assert not found, f"Deleted material {material_id} should not be in active list"
         print(f"Deleted material {material_id} successfully")
 
@@ -363,30 +364,26 @@ class TestCleanup:
     """Cleanup test data"""
     
     @pytest.fixture(autouse=True)
-    def setup(self):
-        """Login as super admin"""
-        response = requests.post(f"{BASE_URL}/api/auth/login", json=SUPER_ADMIN_CREDS)
-        if response.status_code != 200:
-            pytest.skip(f"Super Admin login failed: {response.text}")
-        data = response.json()
-        self.token = data.get("token")
-        self.headers = {"Authorization": f"Bearer {self.token}"}
+    def setup(self, superadmin_session):
+        """Reuse the session-scoped Super Admin login"""
+        self.session = superadmin_session
     
     def test_cleanup_test_materials(self):
         """Clean up TEST_ prefixed materials"""
-        response = requests.get(f"{BASE_URL}/api/superadmin/reference-materials", headers=self.headers)
+        response = self.session.get(URLS.ref_materials)
         if response.status_code != 200:
             print("Could not fetch materials for cleanup")
             return
         
-        materials = response.json()
+        materials = response_json(response)
         test_materials = [m for m in materials if m.get("title", "").startswith("TEST_")]
         
-        for material in test_materials:
-            delete_response = requests.delete(
-                f"{BASE_URL}/api/superadmin/reference-materials/{material['id']}",
-                headers=self.headers
-            )
+        # No bulk-delete endpoint exists, so fan the DELETEs out over the shared pool
+        urls = [f"{URLS.ref_materials}/{m['id']}" for m in test_materials]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            delete_responses = list(executor.map(self.session.delete, urls))
+        
+        for material, delete_response in zip(test_materials, delete_responses):
             if delete_response.status_code in [200, 204]:
                 print(f"Cleaned up test material: {material['title']}")
         
@@ -10,35 +10,53 @@ import sys
 from docx import Document
 from typing import List, Dict, Any, Optional
 import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Compiled once at import; these run on every line of every document
+_PAGE_RE = re.compile(r'Page:\s*\d+/\d+')
+_MARKS_RES = [re.compile(p, re.IGNORECASE) for p in (
+    r'\[(\d+)\s*(?:mark|marks|m)\]',
+    r'\((\d+)\s*(?:mark|marks|m)\)',
+    r'(\d+)\s*(?:mark|marks)\s*$',
+    r'\[(\d+)\]',
+)]
+_Q_START_RE = re.compile(r'^(?:Q\.?\s*)?(\d+)[.\)]\s*(.+)')
+_PAPER_Q_START_RE = re.compile(r'^(\d+)[.\)]\s*(.+)')
+_OPT_RE = re.compile(r'^[(\[]?([a-dA-D])[)\].\s]+(.+)')
+_ANS_RE = re.compile(r'^(?:Ans(?:wer)?|Correct\s*Answer)[:\s]+(.+)', re.IGNORECASE)
+_TRAILING_MARKS_RE = re.compile(r'\[?\d+\s*(?:mark|marks|m)?\]?$', re.IGNORECASE)
+_HEADER_PREFIXES = ("Section", "SECTION", "General Instructions", "Time", "Maximum Marks", "CLASS", "COMPUTER SCIENCE")
+_OR_RE = re.compile(r'^OR\s*$', re.IGNORECASE)
 
 def clean_text(text: str) -> str:
     """Clean and normalize text"""
-    # Remove page markers
-    text = re.sub(r'Page:\s*\d+/\d+', '', text)
-    # Normalize whitespace
-    text = ' '.join(text.split())
-    return text.strip()
+    # Remove page markers; most lines have none, so skip the regex for them
+    if 'Page:' in text:
+        text = _PAGE_RE.sub('', text)
+    # Normalize whitespace (split() already drops leading/trailing runs)
+    return ' '.join(text.split())
 
 def extract_marks(text: str) -> Optional[int]:
     """Extract marks from question text"""
-    patterns = [
-        r'\[(\d+)\s*(?:mark|marks|m)\]',
-        r'\((\d+)\s*(?:mark|marks|m)\)',
-        r'(\d+)\s*(?:mark|marks)\s*$',
-        r'\[(\d+)\]',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in _MARKS_RES:
+        match = pattern.search(text)
         if match:
             return int(match.group(1))
     return None
 
 def detect_question_type(text: str, options: List[str]) -> str:
     """Detect question type based on content"""
-    text_lower = text.lower()
-    
+    # Options alone decide MCQ, so check them before lowercasing the text
     if options and len(options) >= 2:
         return "mcq"
+    
+    text_lower = text.lower()
     if "true or false" in text_lower or "true/false" in text_lower:
         return "true_false"
     if "assertion" in text_lower and "reason" in text_lower:
@@ -62,14 +80,14 @@ def parse_chapter_question_bank(filepath: str, chapter_name: str) -> List[Dict[s
     """Parse chapter-wise question bank documents"""
     doc = Document(filepath)
     questions = []
-    current_question = None
+    # Question lines are buffered and joined once when the question is saved
+    current_question_parts = []
     current_options = []
     current_answer = None
     
-    full_text = "\n".join([para.text for para in doc.paragraphs])
-    
-    # Split by question patterns
-    lines = full_text.split('\n')
+    # Paragraph text can hold soft line breaks, so split each paragraph in turn
+    # instead of joining the whole document and splitting it again
+    lines = (line for para in doc.paragraphs for line in para.text.split('\n'))
     
     for line in lines:
         line = clean_text(line)
@@ -77,14 +95,15 @@ def parse_chapter_question_bank(filepath: str, chapter_name: str) -> List[Dict[s
             continue
         
         # Check for question start
-        q_match = re.match(r'^(?:Q\.?\s*)?(\d+)[.\)]\s*(.+)', line)
+        q_match = _Q_START_RE.match(line)
         if q_match:
             # Save previous question
-            if current_question:
+            if current_question_parts:
+                current_question = " ".join(current_question_parts)
                 q_type = detect_question_type(current_question, current_options)
                 marks = extract_marks(current_question) or (1 if q_type == "mcq" else 2)
                 questions.append({
-                    "questionText": re.sub(r'\[?\d+\s*(?:mark|marks|m)?\]?$', '', current_question, flags=re.IGNORECASE).strip(),
+                    "questionText": _TRAILING_MARKS_RE.sub('', current_question).strip(),
                     "type": q_type,
                     "marks": marks,
                     "options": current_options if current_options else None,
@@ -92,33 +111,34 @@ def parse_chapter_question_bank(filepath: str, chapter_name: str) -> List[Dict[s
                     "chapter": chapter_name,
                 })
             
-            current_question = q_match.group(2)
+            current_question_parts = [q_match.group(2)]
             current_options = []
             current_answer = None
             continue
         
         # Check for options
-        opt_match = re.match(r'^[(\[]?([a-dA-D])[)\].\s]+(.+)', line)
-        if opt_match and current_question:
+        opt_match = _OPT_RE.match(line)
+        if opt_match and current_question_parts:
             current_options.append(f"{opt_match.group(1)}) {opt_match.group(2)}")
             continue
         
         # Check for answer
-        ans_match = re.match(r'^(?:Ans(?:wer)?|Correct\s*Answer)[:\s]+(.+)', line, re.IGNORECASE)
+        ans_match = _ANS_RE.match(line)
         if ans_match:
             current_answer = ans_match.group(1).strip()
             continue
         
         # Append to current question if exists
-        if current_question and line:
-            current_question += " " + line
+        if current_question_parts and line:
+            current_question_parts.append(line)
     
     # Don't forget last question
-    if current_question:
+    if current_question_parts:
+        current_question = " ".join(current_question_parts)
         q_type = detect_question_type(current_question, current_options)
         marks = extract_marks(current_question) or (1 if q_type == "mcq" else 2)
         questions.append({
-            "questionText": re.sub(r'\[?\d+\s*(?:mark|marks|m)?\]?$', '', current_question, flags=re.IGNORECASE).strip(),
+            "questionText": _TRAILING_MARKS_RE.sub('', current_question).strip(),
             "type": q_type,
             "marks": marks,
             "options": current_options if current_options else None,
@@ -133,13 +153,15 @@ def parse_question_paper(filepath: str, paper_name: str) -> List[Dict[str, Any]]
     doc = Document(filepath)
     questions = []
     
-    full_text = "\n".join([para.text for para in doc.paragraphs])
-    # Clean page markers
-    full_text = re.sub(r'Page:\s*\d+/\d+', '\n', full_text)
-    
-    lines = full_text.split('\n')
+    # Clean page markers per paragraph; a marker also ends the line it is on
+    lines = (
+        line
+        for para in doc.paragraphs
+        for line in _PAGE_RE.sub('\n', para.text).split('\n')
+    )
     
-    current_question = None
+    # Question lines are buffered and joined once when the question is saved
+    current_question_parts = []
     current_options = []
     current_marks = None
     in_options = False
@@ -150,14 +172,15 @@ def parse_question_paper(filepath: str, paper_name: str) -> List[Dict[str, Any]]
             continue
         
         # Skip headers and section markers
-        if re.match(r'^(Section|SECTION|General Instructions|Time|Maximum Marks|CLASS|COMPUTER SCIENCE)', line):
+        if line.startswith(_HEADER_PREFIXES):
             continue
         
         # Check for question start (various formats)
-        q_match = re.match(r'^(\d+)[.\)]\s*(.+)', line)
+        q_match = _PAPER_Q_START_RE.match(line)
         if q_match:
             # Save previous question
-            if current_question and len(current_question) > 10:
+            current_question = " ".join(current_question_parts)
+            if len(current_question) > 10:
                 q_type = detect_question_type(current_question, current_options)
                 if not current_marks:
                     current_marks = 1 if q_type == "mcq" else 2
@@ -171,30 +194,31 @@ def parse_question_paper(filepath: str, paper_name: str) -> List[Dict[str, Any]]
                     "source": paper_name,
                 })
             
-            current_question = q_match.group(2)
+            current_question_parts = [q_match.group(2)]
             current_options = []
             current_marks = extract_marks(line)
             in_options = False
             continue
         
         # Check for options (a), (b), (c), (d) or A), B), C), D)
-        opt_match = re.match(r'^[(\[]?([a-dA-D])[)\].\s]+(.+)', line)
-        if opt_match and current_question:
+        opt_match = _OPT_RE.match(line)
+        if opt_match and current_question_parts:
             option_text = f"{opt_match.group(1).upper()}) {opt_match.group(2)}"
             current_options.append(option_text)
             in_options = True
             continue
         
         # Check for OR questions
-        if re.match(r'^OR\s*$', line, re.IGNORECASE):
+        if _OR_RE.match(line):
             continue
         
         # Append to current question
-        if current_question and not in_options:
-            current_question += " " + line
+        if current_question_parts and not in_options:
+            current_question_parts.append(line)
     
     # Last question
-    if current_question and len(current_question) > 10:
+    current_question = " ".join(current_question_parts)
+    if len(current_question) > 10:
         q_type = detect_question_type(current_question, current_options)
         if not current_marks:
             current_marks = 1 if q_type == "mcq" else 2
@@ -210,6 +234,14 @@ def parse_question_paper(filepath: str, paper_name: str) -> List[Dict[str, Any]]
     
     return questions
 
+def parse_file(job):
+    """Run one (parser, filepath, label) job, returning (questions, error)"""
+    parse_fn, filepath, label = job
+    try:
+        return parse_fn(filepath, label), None
+    except Exception as e:
+        return None, e
+
 def main():
     all_questions = []
     
@@ -220,18 +252,6 @@ def main():
         "question_docs/chapter5.docx": "Exception Handling",
     }
     
-    print("=" * 60)
-    print("PARSING CHAPTER-WISE QUESTION BANKS")
-    print("=" * 60)
-    
-    for filepath, chapter in chapter_files.items():
-        try:
-            questions = parse_chapter_question_bank(filepath, chapter)
-            all_questions.extend(questions)
-            print(f"✓ {chapter}: {len(questions)} questions parsed")
-        except Exception as e:
-            print(f"✗ Error parsing {filepath}: {e}")
-    
     # Parse Question Papers
     paper_files = {
         "question_docs/ssm_final.docx": "SSM Final 2025-26",
@@ -240,17 +260,37 @@ def main():
         "question_docs/sqp_24_25.docx": "SQP 2024-25",
     }
     
+    # Open and parse every document concurrently; map() keeps input order,
+    # so the report and the output file come out in the same order as before
+    jobs = [(parse_chapter_question_bank, filepath, chapter) for filepath, chapter in chapter_files.items()]
+    jobs += [(parse_question_paper, filepath, paper_name) for filepath, paper_name in paper_files.items()]
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as executor:
+        results = list(executor.map(parse_file, jobs))
+    
+    chapter_results = zip(chapter_files, results[:len(chapter_files)])
+    paper_results = zip(paper_files, results[len(chapter_files):])
+    
+    print("=" * 60)
+    print("PARSING CHAPTER-WISE QUESTION BANKS")
+    print("=" * 60)
+    
+    for filepath, (questions, error) in chapter_results:
+        if error is not None:
+            print(f"✗ Error parsing {filepath}: {error}")
+            continue
+        all_questions.extend(questions)
+        print(f"✓ {chapter_files[filepath]}: {len(questions)} questions parsed")
+    
     print("\n" + "=" * 60)
     print("PARSING FULL QUESTION PAPERS")
     print("=" * 60)
     
-    for filepath, paper_name in paper_files.items():
-        try:
-            questions = parse_question_paper(filepath, paper_name)
-            all_questions.extend(questions)
-            print(f"✓ {paper_name}: {len(questions)} questions parsed")
-        except Exception as e:
-            print(f"✗ Error parsing {filepath}: {e}")
+    for filepath, (questions, error) in paper_results:
+        if error is not None:
+            print(f"✗ Error parsing {filepath}: {error}")
+            continue
+        all_questions.extend(questions)
+        print(f"✓ {paper_files[filepath]}: {len(questions)} questions parsed")
     
     # Summary
     print("\n" + "=" * 60)
@@ -259,29 +299,31 @@ def main():
     print(f"Total Questions Parsed: {len(all_questions)}")
     
     # Count by type
-    type_counts = {}
-    for q in all_questions:
-        t = q.get("type", "unknown")
-        type_counts[t] = type_counts.get(t, 0) + 1
+    type_counts = Counter(q.get("type", "unknown") for q in all_questions)
     
     print("\nBy Type:")
     for t, count in sorted(type_counts.items()):
         print(f"  - {t}: {count}")
     
     # Count by chapter/source
-    chapter_counts = {}
-    for q in all_questions:
-        ch = q.get("chapter") or q.get("source", "Unknown")
-        chapter_counts[ch] = chapter_counts.get(ch, 0) + 1
+    chapter_counts = Counter(q.get("chapter") or q.get("source", "Unknown") for q in all_questions)
     
     print("\nBy Chapter/Source:")
     for ch, count in sorted(chapter_counts.items()):
         print(f"  - {ch}: {count}")
     
-    # Save to JSON
+    # Save to JSON; --compact writes one line for machine consumers
     output_file = "parsed_questions.json"
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(all_questions, f, indent=2, ensure_ascii=False)
+    if "--compact" in sys.argv[1:]:
+        if orjson is not None:
+            with open(output_file, "wb") as f:
+                f.write(orjson.dumps(all_questions))
+        else:
+            with open(output_file, "w", encoding="utf-8") as f:
+                json.dump(all_questions, f, ensure_ascii=False, separators=(",", ":"))
+    else:
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(all_questions, f, indent=2, ensure_ascii=False)
     
     print(f"\n✓ Saved to {output_file}")
     
@@ -5,30 +5,106 @@ Handles various formats including embedded page markers
 """
 
 import json
+import os
 import re
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from docx import Document
 from typing import List, Dict, Any, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Compiled once at import; these run on every line and question of every document
+# Both page-marker formats ("Page: 3/12" and "Page 3 of 12") in one pass
+_PAGE_RE = re.compile(r'Page(?::\s*\d+/\d+|\s+\d+\s+of\s+\d+)')
+# Matched against lowercased text (see extract_marks_lower), so no IGNORECASE
+_MARKS_AT_END_RE = re.compile(r'(\d+)\s*(?:mark|marks)\s*$')
+_MARKS_RES = [
+    re.compile(r'\[(\d+)\s*(?:mark|marks|m)\]'),
+    re.compile(r'\((\d+)\s*(?:mark|marks|m)\)'),
+    _MARKS_AT_END_RE,
+    re.compile(r'\[(\d+)\]'),
+    re.compile(r'marks\s*(\d+)'),
+]
+
+# parse_document_universal
+# Every line is classified by one match; the first branch that matches wins,
+# in the order the separate header/question/option/OR checks used to run
+_LINE_RE = re.compile(
+    r'(?P<header>^(?:Section|SECTION|General Instructions|Time Allowed|Maximum Marks|CLASS|COMPUTER SCIENCE|MARKING SCHEME|Q\s*No\s+Section))'
+    r'|(?P<q_no>^Q\.?\s*No\.?\s*(\d+))'           # Q No. 1
+    r'|(?P<q_prefix>^Q\.?\s*(\d+)[.\):\s])'       # Q.1 or Q1) or Q1:
+    r'|(?P<q_dot>^(\d+)[.\)]\s+)'                 # 1. or 1)
+    r'|(?P<q_bare>^(\d+)\s+(?=[A-Z]))'            # 1 What...
+    r'|(?P<option>^[(\[]?([a-dA-D])[)\].\s]+(.+))'
+    r'|(?P<or>^OR\s*$)',
+    re.IGNORECASE
+)
+_Q_START_KINDS = frozenset({'q_no', 'q_prefix', 'q_dot', 'q_bare'})
+_TRAIL_MARKS_RE = re.compile(r'\s*(Marks?|marks?)\s*\d*\s*$')
+_TRAIL_NUM_RE = re.compile(r'\[?\d+\]?\s*$')
+
+# parse_chapter_bank
+_BANK_Q_ANCHOR_RE = re.compile(r'(?:Q\.?\s*)?(\d+)[.\)]\s*', re.IGNORECASE)
+_BANK_Q_NEXT_RE = re.compile(r'(?:Q\.?\s*)?\d+[.\)]', re.IGNORECASE)
+_BANK_ANSWER_RE = re.compile(r'(?:Ans(?:wer)?|Correct\s*Answer)[:\s]+(.+?)(?=\s*(?:Q\.?\s*)?\d+[.\)]|$)', re.IGNORECASE)
+_BANK_OPTION_RE = re.compile(r'[(\[]?([a-dA-D])[)\].\s]+([^(\[a-dA-D]+?)(?=[(\[]?[a-dA-D][)\].\s]|$)')
+_BANK_FIRST_OPTION_RE = re.compile(r'[(\[]?[a-dA-D][)\].\s]')
+_BANK_TRAIL_MARKS_RE = re.compile(r'\s*\[?\d+\s*(?:mark|marks|m)?\]?\s*$', re.IGNORECASE)
+
+def load_paragraphs(filepath: str) -> List[str]:
+    """Paragraph texts of a .docx, cached beside it until the file changes"""
+    cache_path = f"{filepath}.cache.json"
+    stat = os.stat(filepath)
+    key = [stat.st_mtime_ns, stat.st_size]
+    try:
+        with open(cache_path, "rb") as f:
+            cached = _json_loads(f.read())
+        if cached["key"] == key and isinstance(cached["paragraphs"], list):
+            return cached["paragraphs"]
+    except Exception:
+        pass  # Missing or malformed cache: parse the document again
+    
+    # Unzipping and parsing the document XML is the expensive part
+    paragraphs = [para.text for para in Document(filepath).paragraphs]
+    cache = {"key": key, "paragraphs": paragraphs}
+    try:
+        # Written to a temp file and renamed, so an interrupted run never leaves half a cache
+        with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(cache_path) or ".", suffix=".tmp", delete=False) as tmp:
+            tmp.write(orjson.dumps(cache) if orjson is not None else json.dumps(cache).encode("utf-8"))
+        os.replace(tmp.name, cache_path)
+    except OSError:
+        pass  # Read-only location: just parse again next time
+    return paragraphs
+
 def clean_text(text: str) -> str:
     """Clean and normalize text"""
-    # Remove page markers (various formats)
-    text = re.sub(r'Page:\s*\d+/\d+', ' ', text)
-    text = re.sub(r'Page\s+\d+\s+of\s+\d+', ' ', text)
-    # Normalize whitespace
-    text = ' '.join(text.split())
-    return text.strip()
+    # Remove page markers (various formats); most lines have none, so skip the regex for them
+    if 'Page' in text:
+        text = _PAGE_RE.sub(' ', text)
+    # Normalize whitespace (split() already drops leading/trailing runs)
+    return ' '.join(text.split())
 
 def extract_marks(text: str) -> Optional[int]:
     """Extract marks from question text"""
-    patterns = [
-        r'\[(\d+)\s*(?:mark|marks|m)\]',
-        r'\((\d+)\s*(?:mark|marks|m)\)',
-        r'(\d+)\s*(?:mark|marks)\s*$',
-        r'\[(\d+)\]',
-        r'Marks\s*(\d+)',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    return extract_marks_lower(text.lower())
+
+def extract_marks_lower(text_lower: str) -> Optional[int]:
+    """Extract marks from already-lowercased question text"""
+    # The end-anchored pattern is retried at every digit in the text, so only
+    # run it when the text actually ends with the word "mark(s)"
+    ends_with_marks = text_lower.rstrip()[-5:].endswith(('mark', 'marks'))
+    for pattern in _MARKS_RES:
+        if pattern is _MARKS_AT_END_RE and not ends_with_marks:
+            continue
+        match = pattern.search(text_lower)
         if match:
             return int(match.group(1))
     return None
@@ -49,7 +125,7 @@ def detect_question_type(text: str, options: List[str]) -> str:
         return "matching"
     
     # Based on marks
-    marks = extract_marks(text)
+    marks = extract_marks_lower(text_lower)
     if marks:
         if marks >= 4:
             return "long_answer"
@@ -58,124 +134,130 @@ def detect_question_type(text: str, options: List[str]) -> str:
     
     return "short_answer"
 
+@dataclass
+class _QuestionState:
+    """The question parse_document_universal is currently reading"""
+    buffer: List[str] = field(default_factory=list)
+    options: List[str] = field(default_factory=list)
+    marks: Optional[int] = None
+    q_num: Optional[str] = None
+
+def save_current_question(state: _QuestionState, questions: List[Dict[str, Any]], chapter_default: str, source_name: str):
+    """Append the buffered question to questions (if long enough) and reset state for the next one"""
+    if state.buffer:
+        q_text = ' '.join(state.buffer)
+        q_text = _TRAIL_MARKS_RE.sub('', q_text).strip()
+        q_text = _TRAIL_NUM_RE.sub('', q_text).strip()
+        
+        if len(q_text) > 15:  # Minimum question length
+            q_type = detect_question_type(q_text, state.options)
+            marks = state.marks or (1 if q_type == "mcq" else 2)
+            
+            questions.append({
+                "questionText": q_text,
+                "type": q_type,
+                "marks": marks,
+                "options": state.options or None,
+                "correctAnswer": None,
+                "chapter": chapter_default,
+                "source": source_name,
+            })
+    
+    state.buffer = []
+    state.options = []
+    state.marks = None
+
 def parse_document_universal(filepath: str, source_name: str, chapter_default: str = "Mixed") -> List[Dict[str, Any]]:
     """Universal parser that handles multiple document formats"""
-    doc = Document(filepath)
     questions = []
     
-    # Combine all text
-    full_text = ""
-    for para in doc.paragraphs:
-        full_text += para.text + "\n"
+    # Combine all text (joined once; += in a loop can copy the prefix each time)
+    full_text = "\n".join(load_paragraphs(filepath)) + "\n"
     
     # Clean page markers
-    full_text = re.sub(r'Page:\s*\d+/\d+', '\n', full_text)
-    full_text = re.sub(r'Page\s+\d+\s+of\s+\d+', '\n', full_text)
+    full_text = _PAGE_RE.sub('\n', full_text)
     
     # Split into lines and clean
     lines = [clean_text(l) for l in full_text.split('\n')]
     lines = [l for l in lines if l]
     
-    current_question = None
-    current_q_num = None
-    current_options = []
-    current_marks = None
-    question_buffer = []
-    
-    # Patterns for question detection
-    q_patterns = [
-        r'^Q\.?\s*No\.?\s*(\d+)',  # Q No. 1
-        r'^Q\.?\s*(\d+)[.\):\s]',   # Q.1 or Q1) or Q1:
-        r'^(\d+)[.\)]\s+',          # 1. or 1)
-        r'^(\d+)\s+(?=[A-Z])',      # 1 What...
-    ]
-    
-    option_pattern = r'^[(\[]?([a-dA-D])[)\].\s]+(.+)'
-    
-    def save_current_question():
-        nonlocal current_question, current_options, current_marks, question_buffer
-        
-        if question_buffer:
-            q_text = ' '.join(question_buffer)
-            q_text = re.sub(r'\s*(Marks?|marks?)\s*\d*\s*$', '', q_text).strip()
-            q_text = re.sub(r'\[?\d+\]?\s*$', '', q_text).strip()
-            
-            if len(q_text) > 15:  # Minimum question length
-                q_type = detect_question_type(q_text, current_options)
-                if not current_marks:
-                    current_marks = 1 if q_type == "mcq" else 2
-                
-                questions.append({
-                    "questionText": q_text,
-                    "type": q_type,
-                    "marks": current_marks,
-                    "options": current_options if current_options else None,
-                    "correctAnswer": None,
-                    "chapter": chapter_default,
-                    "source": source_name,
-                })
-        
-        question_buffer = []
-        current_options = []
-        current_marks = None
+    state = _QuestionState()
     
     for line in lines:
+        match = _LINE_RE.match(line)
+        kind = match.lastgroup if match else None
+        
         # Skip headers and instructions
-        if re.match(r'^(Section|SECTION|General Instructions|Time Allowed|Maximum Marks|CLASS|COMPUTER SCIENCE|MARKING SCHEME|Q\s*No\s+Section)', line, re.IGNORECASE):
+        if kind == 'header':
             continue
         
         # Check for new question
-        new_q = False
-        for pattern in q_patterns:
-            match = re.match(pattern, line, re.IGNORECASE)
-            if match:
-                save_current_question()
-                new_q = True
-                current_q_num = match.group(1)
-                # Get rest of line after question number
-                rest = re.sub(pattern, '', line, flags=re.IGNORECASE).strip()
-                if rest:
-                    question_buffer.append(rest)
-                current_marks = extract_marks(line)
-                break
-        
-        if new_q:
+        if kind in _Q_START_KINDS:
+            save_current_question(state, questions, chapter_default, source_name)
+            # The question number is the group nested right inside the branch
+            state.q_num = match.group(match.lastindex + 1)
+            # Get rest of line after question number
+            rest = line[match.end():].strip()
+            if rest:
+                state.buffer.append(rest)
+            state.marks = extract_marks(line)
             continue
         
         # Check for options
-        opt_match = re.match(option_pattern, line)
-        if opt_match and question_buffer:
-            option_text = f"{opt_match.group(1).upper()}) {opt_match.group(2)}"
-            current_options.append(option_text)
+        if kind == 'option' and state.buffer:
+            option_text = f"{match.group(match.lastindex + 1).upper()}) {match.group(match.lastindex + 2)}"
+            state.options.append(option_text)
             continue
         
         # Skip OR markers
-        if re.match(r'^OR\s*$', line, re.IGNORECASE):
+        if kind == 'or':
             continue
         
         # Add to question buffer
-        if question_buffer or current_q_num:
-            question_buffer.append(line)
+        if state.buffer or state.q_num:
+            state.buffer.append(line)
     
     # Don't forget last question
-    save_current_question()
+    save_current_question(state, questions, chapter_default, source_name)
     
     return questions
 
+def iter_bank_questions(full_text: str):
+    """Yield (number, body) for each numbered question in a chapter bank"""
+    # Forward scan equivalent to the old lazy-body-plus-lookahead findall():
+    # a body is at least one character and stops at the next "N." / "N)" /
+    # "Q N." (even mid-number, as the lookahead did) or at the end of text
+    end = len(full_text)
+    # `$` also matched just before a trailing newline
+    text_end = end - 1 if full_text.endswith('\n') else end
+    pos = 0
+    while True:
+        anchor = _BANK_Q_ANCHOR_RE.search(full_text, pos)
+        if not anchor:
+            return
+        if anchor.end() == end:
+            # Nothing left for the body but the whitespace the anchor consumed
+            if anchor.group(0)[-1].isspace():
+                yield anchor.group(1), full_text[-1]
+            return
+        start = anchor.end()
+        stop = text_end if start < text_end else end
+        next_q = _BANK_Q_NEXT_RE.search(full_text, start + 1, stop)
+        if next_q:
+            stop = next_q.start()
+        yield anchor.group(1), full_text[start:stop]
+        pos = stop
+
 def parse_chapter_bank(filepath: str, chapter_name: str) -> List[Dict[str, Any]]:
     """Parse chapter-wise question bank with special handling"""
-    doc = Document(filepath)
     questions = []
     
-    full_text = "\n".join([para.text for para in doc.paragraphs])
+    full_text = "\n".join(load_paragraphs(filepath))
     
     # Look for structured Q&A patterns
     # Pattern: Q1. question text... Ans: answer
     
-    q_pattern = r'(?:Q\.?\s*)?(\d+)[.\)]\s*(.+?)(?=(?:Q\.?\s*)?\d+[.\)]|$)'
-    matches = re.findall(q_pattern, full_text, re.DOTALL | re.IGNORECASE)
-    
-    for q_num, q_content in matches:
+    for q_num, q_content in iter_bank_questions(full_text):
         q_content = clean_text(q_content)
         
         if len(q_content) < 15:
@@ -183,19 +265,19 @@ def parse_chapter_bank(filepath: str, chapter_name: str) -> List[Dict[str, Any]]
         
         # Extract answer if present
         answer = None
-        ans_match = re.search(r'(?:Ans(?:wer)?|Correct\s*Answer)[:\s]+(.+?)(?=\s*(?:Q\.?\s*)?\d+[.\)]|$)', q_content, re.IGNORECASE)
+        ans_match = _BANK_ANSWER_RE.search(q_content)
         if ans_match:
             answer = clean_text(ans_match.group(1))
             q_content = q_content[:ans_match.start()].strip()
         
         # Extract options
         options = []
-        for opt_match in re.finditer(r'[(\[]?([a-dA-D])[)\].\s]+([^(\[a-dA-D]+?)(?=[(\[]?[a-dA-D][)\].\s]|$)', q_content):
+        for opt_match in _BANK_OPTION_RE.finditer(q_content):
             options.append(f"{opt_match.group(1).upper()}) {clean_text(opt_match.group(2))}")
         
         # Clean question text (remove options if found inline)
         if options:
-            first_opt = re.search(r'[(\[]?[a-dA-D][)\].\s]', q_content)
+            first_opt = _BANK_FIRST_OPTION_RE.search(q_content)
             if first_opt:
                 q_content = q_content[:first_opt.start()].strip()
         
@@ -203,7 +285,7 @@ def parse_chapter_bank(filepath: str, chapter_name: str) -> List[Dict[str, Any]]
         marks = extract_marks(q_content) or (1 if q_type == "mcq" else 2)
         
         # Clean marks from question text
-        q_content = re.sub(r'\s*\[?\d+\s*(?:mark|marks|m)?\]?\s*$', '', q_content, flags=re.IGNORECASE).strip()
+        q_content = _BANK_TRAIL_MARKS_RE.sub('', q_content).strip()
         
         if len(q_content) > 15:
             questions.append({
@@ -218,6 +300,22 @@ def parse_chapter_bank(filepath: str, chapter_name: str) -> List[Dict[str, Any]]
     
     return questions
 
+def parse_chapter_file(filepath: str, chapter: str) -> List[Dict[str, Any]]:
+    """Parse a chapter bank, falling back to the universal parser"""
+    questions = parse_chapter_bank(filepath, chapter)
+    if len(questions) < 5:  # Fallback to universal parser
+        questions = parse_document_universal(filepath, f"Chapter - {chapter}", chapter)
+    return questions
+
+def parse_file(job):
+    """Run one (parser, filepath, label) job, returning (questions, error message)"""
+    parse_fn, filepath, label = job
+    try:
+        return parse_fn(filepath, label), None
+    except Exception as e:
+        # Sent back as text: not every exception survives pickling to the parent
+        return None, str(e)
+
 def main():
     all_questions = []
     
@@ -228,20 +326,6 @@ def main():
         "question_docs/chapter5.docx": "Exception Handling",
     }
     
-    print("=" * 60)
-    print("PARSING CHAPTER-WISE QUESTION BANKS")
-    print("=" * 60)
-    
-    for filepath, chapter in chapter_files.items():
-        try:
-            questions = parse_chapter_bank(filepath, chapter)
-            if len(questions) < 5:  # Fallback to universal parser
-                questions = parse_document_universal(filepath, f"Chapter - {chapter}", chapter)
-            all_questions.extend(questions)
-            print(f"✓ {chapter}: {len(questions)} questions parsed")
-        except Exception as e:
-            print(f"✗ Error parsing {filepath}: {e}")
-    
     # Parse Question Papers with universal parser
     paper_files = {
         "question_docs/ssm_final.docx": "SSM Final 2025-26",
@@ -250,17 +334,37 @@ def main():
         "question_docs/sqp_24_25.docx": "SQP 2024-25",
     }
     
+    # Parsing is CPU-bound Python (regex and string work), so run each document
+    # in its own process; map() keeps input order for the report and output
+    jobs = [(parse_chapter_file, filepath, chapter) for filepath, chapter in chapter_files.items()]
+    jobs += [(parse_document_universal, filepath, paper_name) for filepath, paper_name in paper_files.items()]
+    with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(jobs))) as executor:
+        results = list(executor.map(parse_file, jobs))
+    
+    chapter_results = zip(chapter_files, results[:len(chapter_files)])
+    paper_results = zip(paper_files, results[len(chapter_files):])
+    
+    print("=" * 60)
+    print("PARSING CHAPTER-WISE QUESTION BANKS")
+    print("=" * 60)
+    
+    for filepath, (questions, error) in chapter_results:
+        if error is not None:
+            print(f"✗ Error parsing {filepath}: {error}")
+            continue
+        all_questions.extend(questions)
+        print(f"✓ {chapter_files[filepath]}: {len(questions)} questions parsed")
+    
     print("\n" + "=" * 60)
     print("PARSING FULL QUESTION PAPERS")
     print("=" * 60)
     
-    for filepath, paper_name in paper_files.items():
-        try:
-            questions = parse_document_universal(filepath, paper_name)
-            all_questions.extend(questions)
-            print(f"✓ {paper_name}: {len(questions)} questions parsed")
-        except Exception as e:
-            print(f"✗ Error parsing {filepath}: {e}")
+    for filepath, (questions, error) in paper_results:
+        if error is not None:
+            print(f"✗ Error parsing {filepath}: {error}")
+            continue
+        all_questions.extend(questions)
+        print(f"✓ {paper_files[filepath]}: {len(questions)} questions parsed")
     
     # Remove duplicates based on question text similarity
     seen = set()
@@ -279,20 +383,14 @@ def main():
     print(f"Unique Questions: {len(unique_questions)}")
     
     # Count by type
-    type_counts = {}
-    for q in unique_questions:
-        t = q.get("type", "unknown")
-        type_counts[t] = type_counts.get(t, 0) + 1
+    type_counts = Counter(q.get("type", "unknown") for q in unique_questions)
     
     print("\nBy Type:")
     for t, count in sorted(type_counts.items()):
         print(f"  - {t}: {count}")
     
     # Count by chapter/source
-    source_counts = {}
-    for q in unique_questions:
-        src = q.get("source", "Unknown")
-        source_counts[src] = source_counts.get(src, 0) + 1
+    source_counts = Counter(q.get("source", "Unknown") for q in unique_questions)
     
     print("\nBy Source:")
     for src, count in sorted(source_counts.items()):
@@ -300,8 +398,12 @@ def main():
     
     # Save to JSON
     output_file = "parsed_questions.json"
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(unique_questions, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        with open(output_file, "wb") as f:
+            f.write(orjson.dumps(unique_questions, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(unique_questions, f, indent=2, ensure_ascii=False)
     
     print(f"\n✓ Saved {len(unique_questions)} unique questions to {output_file}")
     
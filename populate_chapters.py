@@ -3,8 +3,10 @@
 Populate chapters table on Render based on unique chapters from questions
 """
 
-import requests
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from upload_common import SESSION, RateLimiter
 
 RENDER_URL = "https://question-bank-y6wx.onrender.com"
 
@@ -22,6 +24,9 @@ HOD_CREDS = {
     "password": "HodCS@123"
 }
 
+# Placeholder chapter names the parser assigns when it can't tell
+_SKIP_CHAPTERS = frozenset({"Mixed", "Unknown"})
+
 def api_call(method, endpoint, token=None, data=None):
     """Make API call"""
     url = f"{RENDER_URL}{endpoint}"
@@ -31,9 +36,9 @@ def api_call(method, endpoint, token=None, data=None):
     
     try:
         if method == "GET":
-            resp = requests.get(url, headers=headers, timeout=30)
+            resp = SESSION.get(url, headers=headers, timeout=30)
         elif method == "POST":
-            resp = requests.post(url, json=data, headers=headers, timeout=60)
+            resp = SESSION.post(url, json=data, headers=headers, timeout=60)
         return resp
     except Exception as e:
         print(f"Error: {e}")
@@ -64,13 +69,10 @@ def main():
     print(f"   ✓ Found {len(questions)} questions")
     
     # Extract unique chapters
-    chapters_set = set()
-    for q in questions:
-        chapter = q.get("chapter", "").strip()
-        if chapter and chapter not in ["", "Mixed", "Unknown"]:
-            chapters_set.add(chapter)
-    
-    unique_chapters = sorted(list(chapters_set))
+    unique_chapters = sorted({
+        chapter for q in questions
+        if (chapter := q.get("chapter", "").strip()) and chapter not in _SKIP_CHAPTERS
+    })
     print(f"   ✓ Found {len(unique_chapters)} unique chapters:")
     for ch in unique_chapters:
         print(f"      - {ch}")
@@ -91,20 +93,31 @@ def main():
     created = 0
     skipped = 0
     
-    for i, chapter_name in enumerate(unique_chapters, 1):
-        if chapter_name in existing_names:
-            print(f"   ℹ Skipping (exists): {chapter_name}")
-            skipped += 1
-            continue
-        
+    limiter = RateLimiter()
+    
+    def create_chapter(chapter_name):
         chapter_data = {
             "name": chapter_name,
             "subject": "Computer Science",
             "grade": "12",
             "isLocked": False  # Start unlocked so HOD can use them
         }
+        # Spaced starts keep the burst under the API's per-IP limit
+        limiter.wait()
+        return api_call("POST", "/api/chapters", token, chapter_data)
+    
+    # Send the creates concurrently; results are reported in chapter order below
+    missing = [ch for ch in unique_chapters if ch not in existing_names]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = dict(zip(missing, executor.map(create_chapter, missing)))
+    
+    for chapter_name in unique_chapters:
+        if chapter_name in existing_names:
+            print(f"   ℹ Skipping (exists): {chapter_name}")
+            skipped += 1
+            continue
         
-        resp = api_call("POST", "/api/chapters", token, chapter_data)
+        resp = responses[chapter_name]
         if resp and resp.status_code == 200:
             print(f"   ✓ Created: {chapter_name}")
             created += 1
@@ -19,7 +19,9 @@ from services.question_parser import (
     get_cbse_subjects,
     get_chapters_for_subject,
     classify_question_chapter,
-    CBSE_SUBJECTS
+    CBSE_SUBJECTS,
+    EXT_TO_CONTENT_TYPE,
+    ALLOWED_CONTENT_TYPES
 )
 
 app = FastAPI(
@@ -70,21 +72,13 @@ async def parse_question_paper(
     """
     Parse a question paper PDF or image and extract questions.
     """
-    # Validate file type
-    allowed_types = ['application/pdf', 'image/png', 'image/jpeg', 'image/jpg']
+    # Validate file type, falling back to the extension if content_type is generic
     content_type = file.content_type or 'application/octet-stream'
-    
-    # Check file extension if content_type is generic
     if content_type == 'application/octet-stream':
-        ext = file.filename.lower().split('.')[-1] if file.filename else ''
-        if ext == 'pdf':
-            content_type = 'application/pdf'
-        elif ext in ['png']:
-            content_type = 'image/png'
-        elif ext in ['jpg', 'jpeg']:
-            content_type = 'image/jpeg'
+        ext = (file.filename or '').rsplit('.', 1)[-1].lower()
+        content_type = EXT_TO_CONTENT_TYPE.get(ext, content_type)
     
-    if content_type not in allowed_types:
+    if content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(
             status_code=400, 
             detail=f"Invalid file type. Allowed: PDF, PNG, JPG. Got: {content_type}"
@@ -95,14 +89,12 @@ async def parse_question_paper(
         raise HTTPException(status_code=400, detail="Valid OpenAI API key is required")
     
     try:
-        # Read file
-        file_bytes = await file.read()
-        
-        # Convert to images
-        images = process_image_file(file_bytes, content_type)
+        # UploadFile already spools to disk past its threshold: hand the
+        # spooled file down instead of reading it all into memory
+        await file.seek(0)
         
-        if not images:
-            raise HTTPException(status_code=400, detail="Could not process the uploaded file")
+        # Convert to images (PDF pages are rendered as extraction reaches them)
+        images = process_image_file(file.file, content_type)
         
         # Extract questions using AI
         result = await extract_questions_from_images(
@@ -113,6 +105,9 @@ async def parse_question_paper(
             chapter=chapter
         )
         
+        if not result["totalPages"]:
+            raise HTTPException(status_code=400, detail="Could not process the uploaded file")
+        
         # Add exam type to metadata
         if exam_type:
             result["paperMetadata"]["examType"] = exam_type
@@ -6277,7 +6277,10 @@ export function registerPaperGenerationRoutes(app: Express) {
   // --- Schools CRUD ---
   app.get("/api/superadmin/schools", requireAuth, requireRole("super_admin"), async (req, res) => {
     try {
-      const tenants = await storage.getAllTenants();
+      // ?code= looks up a single school instead of listing every tenant
+      const code = req.query.code as string | undefined;
+      const byCode = code ? await storage.getTenantByCode(code) : undefined;
+      const tenants = code ? (byCode ? [byCode] : []) : await storage.getAllTenants();
       const schools = tenants.filter(t => !t.isDeleted).map(t => ({
         id: t.id,
         name: t.name,
@@ -7181,6 +7184,19 @@ export function registerPaperGenerationRoutes(app: Express) {
     }
   });
 
+  // Get a single reference material (Super Admin)
+  app.get("/api/superadmin/reference-materials/:id", requireAuth, requireRole("super_admin"), async (req, res) => {
+    try {
+      const material = await storage.getReferenceMaterial(req.params.id);
+      if (!material) {
+        return res.status(404).json({ error: "Reference material not found" });
+      }
+      res.json(material);
+    } catch (error: any) {
+      res.status(500).json({ error: error.message });
+    }
+  });
+
   // Create a reference material entry (file metadata - actual S3 upload handled separately)
   app.post("/api/superadmin/reference-materials", requireAuth, requireRole("super_admin"), async (req, res) => {
     try {
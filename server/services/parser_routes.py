@@ -15,7 +15,9 @@ from .question_parser import (
     get_cbse_subjects,
     get_chapters_for_subject,
     classify_question_chapter,
-    CBSE_SUBJECTS
+    CBSE_SUBJECTS,
+    EXT_TO_CONTENT_TYPE,
+    ALLOWED_CONTENT_TYPES
 )
 
 router = APIRouter(prefix="/api/parser", tags=["Question Parser"])
@@ -78,12 +80,16 @@ async def parse_question_paper(
     - **openai_api_key**: Your OpenAI API key for GPT-4 Vision
     """
     
-    # Validate file type
-    allowed_types = ['application/pdf', 'image/png', 'image/jpeg', 'image/jpg']
-    if file.content_type not in allowed_types:
+    # Validate file type, falling back to the extension if content_type is generic
+    content_type = file.content_type or 'application/octet-stream'
+    if content_type == 'application/octet-stream':
+        ext = (file.filename or '').rsplit('.', 1)[-1].lower()
+        content_type = EXT_TO_CONTENT_TYPE.get(ext, content_type)
+    
+    if content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(
             status_code=400, 
-            detail=f"Invalid file type. Allowed: PDF, PNG, JPG. Got: {file.content_type}"
+            detail=f"Invalid file type. Allowed: PDF, PNG, JPG. Got: {content_type}"
         )
     
     # Validate API key
@@ -91,14 +97,12 @@ async def parse_question_paper(
         raise HTTPException(status_code=400, detail="Valid OpenAI API key is required")
     
     try:
-        # Read file
-        file_bytes = await file.read()
-        
-        # Convert to images
-        images = process_image_file(file_bytes, file.content_type)
+        # UploadFile already spools to disk past its threshold: hand the
+        # spooled file down instead of reading it all into memory
+        await file.seek(0)
         
-        if not images:
-            raise HTTPException(status_code=400, detail="Could not process the uploaded file")
+        # Convert to images (PDF pages are rendered as extraction reaches them)
+        images = process_image_file(file.file, content_type)
         
         # Extract questions using AI
         result = await extract_questions_from_images(
@@ -109,6 +113,9 @@ async def parse_question_paper(
             chapter=chapter
         )
         
+        if not result["totalPages"]:
+            raise HTTPException(status_code=400, detail="Could not process the uploaded file")
+        
         # Add exam type to metadata
         if exam_type:
             result["paperMetadata"]["examType"] = exam_type
@@ -5,14 +5,53 @@ Designed for CBSE board format
 """
 
 import os
+import asyncio
 import base64
+import hashlib
 import json
+import re
+import shutil
 import tempfile
-from typing import List, Optional
-from pdf2image import convert_from_path, convert_from_bytes
-from PIL import Image
+import threading
+import time
+from functools import lru_cache
+from types import MappingProxyType
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple, Union
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image, ImageStat
 import io
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the latter
+_json_loads = orjson.loads if orjson is not None else json.loads
+# Fallback for replies that wrap the JSON object in prose
+_JSON_OBJECT_RE = re.compile(r'\{[\s\S]*\}')
+
+# Pages sent to the vision model at once
+VISION_CONCURRENCY = int(os.getenv("VISION_CONCURRENCY", "8"))
+# Account request ceiling, shared by every upload in this process
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+# The SDK retries 429s, 5xx and connection errors with exponential backoff
+# and honours Retry-After; its default of 2 retries drops pages under load
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "6"))
+# Longest side of a page image sent to the vision model
+VISION_MAX_SIDE = 2048
+# Grey-level standard deviation below which a page is treated as blank and
+# sent at low detail; a single line of text on a page already scores above it
+VISION_BLANK_STDDEV = 5
+# pdftoppm runs allowed at once across all uploads in this process
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+_PDF_RENDER_SLOTS = threading.BoundedSemaphore(PDF_WORKERS)
+# Parsed page results, by page image and request context; shared by all workers
+VISION_CACHE_DIR = os.getenv("VISION_CACHE_DIR", os.path.join(tempfile.gettempdir(), "qp_vision_cache"))
+VISION_CACHE_TTL = 30 * 86400  # seconds
+# Oldest entries are evicted once the cache directory grows past this
+VISION_CACHE_MAX_BYTES = int(os.getenv("VISION_CACHE_MAX_MB", "256")) * 1024 * 1024
 
 # CBSE typical subjects and their chapters
 CBSE_SUBJECTS = {
@@ -30,6 +69,15 @@ CBSE_SUBJECTS = {
     "Economics": ["Introduction to Economics", "Consumer Behaviour", "Producer Behaviour", "Market Types", "National Income", "Money and Banking", "Government Budget", "Balance of Payments"]
 }
 
+# Read-only: the keyword tables below and the classifier cache are built from it
+CBSE_SUBJECTS = MappingProxyType({subject: tuple(chapters) for subject, chapters in CBSE_SUBJECTS.items()})
+
+# Per subject, each chapter with its lowercase keywords (words longer than 3 letters)
+_CHAPTER_KEYWORDS = {
+    subject: [(chapter, tuple(kw for kw in chapter.lower().split() if len(kw) > 3)) for chapter in chapters]
+    for subject, chapters in CBSE_SUBJECTS.items()
+}
+
 QUESTION_EXTRACTION_PROMPT = """You are an expert at extracting questions from CBSE board examination papers.
 
 Analyze this question paper image and extract ALL questions with their details.
@@ -87,40 +135,164 @@ Important:
 - Return ONLY valid JSON, no other text"""
 
 
-def encode_image_to_base64(image: Image.Image, format: str = "PNG") -> str:
+def encode_image_to_base64(image: Image.Image, format: str = "JPEG") -> str:
     """Convert PIL Image to base64 string"""
+    # GPT-4o scales high-detail images to fit 2048x2048 anyway
+    if max(image.size) > VISION_MAX_SIDE:
+        image = image.copy()
+        image.thumbnail((VISION_MAX_SIDE, VISION_MAX_SIDE), Image.LANCZOS)
     buffer = io.BytesIO()
-    image.save(buffer, format=format)
-    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+    if format == "JPEG":
+        # Scanned pages are several times smaller as JPEG than as PNG
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        # No optimize=True: its extra Huffman pass costs 2.5x the encode time
+        # for a ~5% smaller payload
+        image.save(buffer, format=format, quality=85)
+    else:
+        image.save(buffer, format=format)
+    # getbuffer() is a view of the encoded image, not another copy of it
+    return base64.b64encode(buffer.getbuffer()).decode('ascii')
 
 
-def pdf_to_images(pdf_bytes: bytes) -> List[Image.Image]:
-    """Convert PDF bytes to list of PIL Images"""
-    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
-        tmp.write(pdf_bytes)
-        tmp_path = tmp.name
-    
-    try:
-        images = convert_from_path(tmp_path, dpi=200)
-        return images
-    finally:
-        os.unlink(tmp_path)
+def page_detail(image: Image.Image) -> str:
+    """Vision detail level for a page: low (a flat 85 tokens) for blank pages, else high"""
+    stddev = ImageStat.Stat(image.convert("L")).stddev[0]
+    return "low" if stddev < VISION_BLANK_STDDEV else "high"
+
+
+def iter_pdf_pages(pdf_file: Union[str, BinaryIO]) -> Iterator[Image.Image]:
+    """Render a PDF path or binary file object one page at a time, as PIL Images"""
+    if isinstance(pdf_file, (str, os.PathLike)):
+        yield from _render_pdf_pages(pdf_file)
+        return
+
+    # pdftoppm needs a real file: copy in 1 MB chunks, never the whole PDF in memory.
+    # The directory is removed with everything in it, however rendering ends
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = os.path.join(tmp_dir, 'upload.pdf')
+        with open(tmp_path, 'wb') as tmp:
+            shutil.copyfileobj(pdf_file, tmp, length=1 << 20)
+        yield from _render_pdf_pages(tmp_path)
+
+
+def _render_pdf_pages(pdf_path: str) -> Iterator[Image.Image]:
+    """Yield each page of the PDF at pdf_path; only one rendered page is held at a time"""
+    page_count = pdfinfo_from_path(pdf_path)["Pages"]
+    for page in range(1, page_count + 1):
+        # Pages are rendered from worker threads; cap concurrent pdftoppm processes
+        with _PDF_RENDER_SLOTS:
+            image = convert_from_path(pdf_path, dpi=200, first_page=page, last_page=page)[0]
+        yield image
+
 
+# Upload content types, and the type to assume for a generic upload by extension
+EXT_TO_CONTENT_TYPE = {'pdf': 'application/pdf', 'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg'}
+ALLOWED_CONTENT_TYPES = frozenset(EXT_TO_CONTENT_TYPE.values()) | {'image/jpg'}
 
-def process_image_file(file_bytes: bytes, mime_type: str) -> List[Image.Image]:
-    """Process uploaded file and return list of images"""
+
+def process_image_file(source: Union[str, BinaryIO], mime_type: str) -> Iterable[Image.Image]:
+    """Process an uploaded file (path or binary file object) into page images; PDFs render lazily"""
     if mime_type == 'application/pdf':
-        return pdf_to_images(file_bytes)
+        return iter_pdf_pages(source)
     else:
         # It's an image file
-        image = Image.open(io.BytesIO(file_bytes))
+        image = Image.open(source)
+        # Decode now, while the upload is still open
+        image.load()
         if image.mode == 'RGBA':
             image = image.convert('RGB')
         return [image]
 
 
+class _RateLimiter:
+    """Token bucket: `burst` requests at once, refilled at per_minute/60 per second"""
+
+    def __init__(self, per_minute: int, burst: int):
+        self.interval = 60 / per_minute
+        self.tolerance = (burst - 1) * self.interval
+        # Time at which the bucket is next completely full (GCRA form)
+        self.full_at = 0.0
+
+    async def wait(self) -> None:
+        # No await between reading and booking a slot, so no lock is needed
+        now = asyncio.get_running_loop().time()
+        full_at = max(self.full_at, now)
+        start = max(now, full_at - self.tolerance)
+        self.full_at = full_at + self.interval
+        await asyncio.sleep(start - now)
+
+
+_OPENAI_LIMITER = _RateLimiter(OPENAI_RPM, burst=VISION_CONCURRENCY)
+
+
+def _vision_cache_key(base64_image: str, context: str) -> str:
+    """Content address of one page request: the image, the context, and the prompt it was parsed with"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (QUESTION_EXTRACTION_PROMPT, context, base64_image):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _vision_cache_get(key: str) -> Optional[dict]:
+    """Cached parse result for key, or None if missing or expired"""
+    path = os.path.join(VISION_CACHE_DIR, f"{key}.json")
+    try:
+        if time.time() - os.path.getmtime(path) > VISION_CACHE_TTL:
+            return None
+        with open(path, 'rb') as f:
+            return _json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _vision_cache_put(key: str, result: dict) -> None:
+    """Store a parse result; written to a temp file and renamed so readers never see half of it"""
+    try:
+        os.makedirs(VISION_CACHE_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=VISION_CACHE_DIR, suffix='.tmp', delete=False, encoding='utf-8') as tmp:
+            json.dump(result, tmp, ensure_ascii=False)
+        os.replace(tmp.name, os.path.join(VISION_CACHE_DIR, f"{key}.json"))
+        _vision_cache_prune()
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Could not cache page result: {str(e)}")
+
+
+def _vision_cache_prune() -> None:
+    """Delete expired entries, then the oldest ones until the cache fits in VISION_CACHE_MAX_BYTES"""
+    now = time.time()
+    entries = []
+    total = 0
+    with os.scandir(VISION_CACHE_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+                if now - stat.st_mtime > VISION_CACHE_TTL:
+                    os.remove(entry.path)
+                    continue
+            except OSError:
+                # Removed by a concurrent prune
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    if total <= VISION_CACHE_MAX_BYTES:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+        if total <= VISION_CACHE_MAX_BYTES:
+            break
+
+
 async def extract_questions_from_images(
-    images: List[Image.Image],
+    images: Iterable[Image.Image],
     openai_api_key: str,
     subject: Optional[str] = None,
     class_level: Optional[str] = None,
@@ -129,23 +301,25 @@ async def extract_questions_from_images(
     """
     Use OpenAI Vision to extract questions from images
     """
-    client = OpenAI(api_key=openai_api_key)
+    client = AsyncOpenAI(api_key=openai_api_key, max_retries=OPENAI_MAX_RETRIES)
     
-    all_questions = []
-    paper_metadata = {}
+    # Build context message
+    context = ""
+    if subject:
+        context += f"Subject: {subject}\n"
+    if class_level:
+        context += f"Class: {class_level}\n"
+    if chapter:
+        context += f"Expected Chapter: {chapter}\n"
+    # Everything before the page image is the same for every page of the
+    # upload, so OpenAI prompt caching can serve it after the first call;
+    # the page number goes last
+    instructions = f"{context}Extract all questions from the attached page image."
     
-    # Process each page
-    for i, image in enumerate(images):
-        base64_image = encode_image_to_base64(image)
-        
-        # Build context message
-        context = ""
-        if subject:
-            context += f"Subject: {subject}\n"
-        if class_level:
-            context += f"Class: {class_level}\n"
-        if chapter:
-            context += f"Expected Chapter: {chapter}\n"
+    async def process_page(i: int, image: Image.Image):
+        # Encoding a page is CPU work: keep it off the event loop
+        base64_image = await asyncio.to_thread(encode_image_to_base64, image)
+        detail = await asyncio.to_thread(page_detail, image)
         
         messages = [
             {
@@ -157,43 +331,57 @@ async def extract_questions_from_images(
                 "content": [
                     {
                         "type": "text",
-                        "text": f"Page {i+1} of question paper.\n{context}\nExtract all questions from this page:"
+                        "text": instructions
                     },
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/png;base64,{base64_image}",
-                            "detail": "high"
+                            "url": f"data:image/jpeg;base64,{base64_image}",
+                            "detail": detail
                         }
+                    },
+                    {
+                        "type": "text",
+                        "text": f"Page {i+1} of question paper."
                     }
                 ]
             }
         ]
         
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o",  # GPT-4 Vision
-                messages=messages,
-                max_tokens=4096,
-                temperature=0.1
-            )
-            
-            content = response.choices[0].message.content
-            
-            # Parse JSON from response
-            # Try to extract JSON from the response
-            try:
-                # Try direct JSON parse
-                result = json.loads(content)
-            except json.JSONDecodeError:
-                # Try to find JSON in the response
-                import re
-                json_match = re.search(r'\{[\s\S]*\}', content)
-                if json_match:
-                    result = json.loads(json_match.group())
+            # Re-uploaded papers and shared cover pages skip the model call.
+            # The page number is left out of the key so repeats match anywhere
+            cache_key = _vision_cache_key(base64_image, instructions)
+            result = await asyncio.to_thread(_vision_cache_get, cache_key)
+            if result is None:
+                await _OPENAI_LIMITER.wait()
+                response = await client.chat.completions.create(
+                    model="gpt-4o",  # GPT-4 Vision
+                    messages=messages,
+                    max_tokens=4096,
+                    temperature=0.1,
+                    response_format={"type": "json_object"}
+                )
+                
+                content = response.choices[0].message.content
+                
+                # Parse JSON from response; JSON mode makes the fallback rare
+                try:
+                    result = _json_loads(content)
+                except json.JSONDecodeError:
+                    # Try to find JSON in the response
+                    json_match = _JSON_OBJECT_RE.search(content)
+                    if json_match:
+                        result = _json_loads(json_match.group())
+                
+                if isinstance(result, dict):
+                    # Stored before the page number and overrides are added below
+                    await asyncio.to_thread(_vision_cache_put, cache_key, result)
                 else:
+                    # A prose reply is not cached, so the page is retried on re-upload
                     result = {"questions": [], "paperMetadata": {}}
             
+            page_questions = []
             if "questions" in result:
                 # Add page number to each question
                 for q in result["questions"]:
@@ -203,14 +391,38 @@ async def extract_questions_from_images(
                         q["subject"] = subject
                     if class_level:
                         q["grade"] = class_level
-                all_questions.extend(result["questions"])
+                page_questions = result["questions"]
+            
+            return page_questions, result.get("paperMetadata")
             
-            if "paperMetadata" in result and i == 0:
-                paper_metadata = result["paperMetadata"]
-                
         except Exception as e:
             print(f"Error processing page {i+1}: {str(e)}")
-            continue
+            return [], None
+    
+    pages = enumerate(images)
+    page_lock = asyncio.Lock()
+    page_results = {}
+    
+    async def worker():
+        # Workers take the next page as they free up, so PDF pages are
+        # rendered (in a thread) while earlier pages' requests are in flight,
+        # and at most VISION_CONCURRENCY pages are held at once
+        while True:
+            async with page_lock:
+                page = await asyncio.to_thread(next, pages, None)
+            if page is None:
+                return
+            i, image = page
+            page_results[i] = await process_page(i, image)
+    
+    await asyncio.gather(*(worker() for _ in range(VISION_CONCURRENCY)))
+    results = [page_results[i] for i in range(len(page_results))]
+    
+    all_questions = []
+    for page_questions, _ in results:
+        all_questions.extend(page_questions)
+    
+    paper_metadata = (results[0][1] if results else None) or {}
     
     # Override metadata with provided values
     if subject:
@@ -221,7 +433,7 @@ async def extract_questions_from_images(
     return {
         "questions": all_questions,
         "paperMetadata": paper_metadata,
-        "totalPages": len(images)
+        "totalPages": len(results)
     }
 
 
@@ -230,19 +442,25 @@ def classify_question_chapter(content: str, subject: str) -> dict:
     Try to classify question into chapter based on keywords
     Returns suggested chapter and topic
     """
-    if subject not in CBSE_SUBJECTS:
-        return {"chapter": None, "topic": None}
+    chapter, topic = _classify_question_chapter(content, subject)
+    return {"chapter": chapter, "topic": topic}
+
+
+@lru_cache(maxsize=2048)
+def _classify_question_chapter(content: str, subject: str) -> Tuple[Optional[str], Optional[str]]:
+    """Cached keyword match behind classify_question_chapter; papers repeat question stems"""
+    chapter_keywords = _CHAPTER_KEYWORDS.get(subject)
+    if chapter_keywords is None:
+        return None, None
     
-    chapters = CBSE_SUBJECTS[subject]
     content_lower = content.lower()
     
     # Simple keyword matching
-    for chapter in chapters:
-        chapter_keywords = chapter.lower().split()
-        if any(kw in content_lower for kw in chapter_keywords if len(kw) > 3):
-            return {"chapter": chapter, "topic": chapter}
+    for chapter, keywords in chapter_keywords:
+        if any(kw in content_lower for kw in keywords):
+            return chapter, chapter
     
-    return {"chapter": None, "topic": None}
+    return None, None
 
 
 def get_cbse_subjects() -> List[str]:
@@ -252,4 +470,4 @@ def get_cbse_subjects() -> List[str]:
 
 def get_chapters_for_subject(subject: str) -> List[str]:
     """Return chapters for a given subject"""
-    return CBSE_SUBJECTS.get(subject, [])
+    return list(CBSE_SUBJECTS.get(subject, ()))
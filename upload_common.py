@@ -0,0 +1,119 @@
+"""
+Shared HTTP plumbing for the scripts that talk to the deployed API:
+upload_questions.py, upload_to_render.py and populate_chapters.py
+"""
+
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MIN_REQUEST_INTERVAL = 0.5  # The API allows 120 requests/min per IP
+TOKEN_CACHE = os.path.expanduser("~/.cache/prashnakosh/token.json")
+TOKEN_MIN_TTL = 60  # Seconds a cached token must still be valid for to be reused
+
+# One keep-alive pool for every call. Only 429s are retried: the rate limiter
+# rejects before the handler runs, so a retried POST can't create twice
+SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429], allowed_methods=None)
+)
+SESSION.mount("https://", _ADAPTER)
+SESSION.mount("http://", _ADAPTER)
+
+
+class RateLimiter:
+    """Hands out start times at least `interval` seconds apart, across threads"""
+
+    def __init__(self, interval=MIN_REQUEST_INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        time.sleep(start - now)
+
+
+class AuthToken:
+    """Login token for one account, reused across runs and renewed once on a 401
+
+    `login(creds)` posts the credentials to /api/auth/login and returns the
+    response body, or None if the login failed.
+    """
+
+    def __init__(self, base_url, creds, login):
+        self.creds = creds
+        self.login = login
+        self.key = f"{base_url}|{creds['schoolCode']}|{creds['email']}"
+        self.lock = threading.Lock()
+        self.token = None
+        entry = read_token_cache().get(self.key)
+        # expiresAt is epoch milliseconds, as returned by /api/auth/login
+        if isinstance(entry, dict) and entry.get("expiresAt", 0) / 1000 - time.time() > TOKEN_MIN_TTL:
+            self.token = entry.get("token")
+
+    def renew(self, stale=None):
+        """Log in again unless another thread already replaced `stale`; returns the token or None"""
+        with self.lock:
+            if self.token and self.token != stale:
+                return self.token
+            data = self.login(self.creds)
+            self.token = data.get("token") if data else None
+            if self.token and data.get("expiresAt"):
+                cache = read_token_cache()
+                cache[self.key] = {"token": self.token, "expiresAt": data["expiresAt"]}
+                write_token_cache(cache)
+            return self.token
+
+    def send(self, request, *args, **kwargs):
+        """Return request(*args, token=..., **kwargs), renewing a rejected token and resending once"""
+        token = self.token
+        resp = request(*args, token=token, **kwargs)
+        # Auth runs before the handler, so resending cannot create anything twice
+        if resp is not None and resp.status_code == 401 and self.renew(token):
+            resp = request(*args, token=self.token, **kwargs)
+        return resp
+
+
+def read_token_cache():
+    """Tokens saved by earlier runs, keyed by URL, school code and email"""
+    try:
+        with open(TOKEN_CACHE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def write_token_cache(cache):
+    """Save the token cache; best-effort, a failed write only costs a login next run"""
+    tmp = f"{TOKEN_CACHE}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(TOKEN_CACHE), exist_ok=True)
+        # Bearer tokens: readable by the owner only
+        with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp, TOKEN_CACHE)
+    except OSError:
+        pass
+
+
+def dumps_json(obj):
+    """Serialize a request body to bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
@@ -5,10 +5,13 @@ Run this script with your Render URL
 Usage: python3 upload_questions.py https://your-app.onrender.com
 """
 
+import functools
+import gzip
 import json
 import sys
-import requests
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from upload_common import SESSION, AuthToken, RateLimiter, dumps_json
 
 # Configuration - UPDATE THESE VALUES
 RENDER_URL = "https://question-bank-y6wx.onrender.com"  # Your Render URL
@@ -20,24 +23,19 @@ HOD_PASSWORD = "HodCS@123"  # HOD password
 BATCH_SIZE = 50  # Upload in batches
 GRADE = "12"
 SUBJECT = "Computer Science"
+UPLOAD_WORKERS = 8  # Batches in flight at once
 
 def load_questions(filepath="parsed_questions.json"):
     """Load parsed questions from JSON file"""
     with open(filepath, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def login(base_url, school_code, email, password):
-    """Login and get auth token"""
+def login(base_url, creds):
+    """Login and return the response body (token and expiresAt)"""
     url = f"{base_url}/api/auth/login"
-    payload = {
-        "schoolCode": school_code,
-        "email": email,
-        "password": password
-    }
-    response = requests.post(url, json=payload, timeout=30)
+    response = SESSION.post(url, json=creds, timeout=30)
     if response.status_code == 200:
-        data = response.json()
-        return data.get("token")
+        return response.json()
     else:
         print(f"Login failed: {response.text}")
         return None
@@ -47,7 +45,9 @@ def upload_batch(base_url, token, questions):
     url = f"{base_url}/api/questions/bulk"
     headers = {
         "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
+        "Content-Type": "application/json",
+        # express.json() inflates gzip bodies; the repeated fields compress well
+        "Content-Encoding": "gzip"
     }
     
     # Format questions for API
@@ -68,7 +68,8 @@ def upload_batch(base_url, token, questions):
         })
     
     payload = {"questions": formatted}
-    response = requests.post(url, json=payload, headers=headers, timeout=60)
+    body = gzip.compress(dumps_json(payload), compresslevel=3)
+    response = SESSION.post(url, data=body, headers=headers, timeout=60)
     return response
 
 def main():
@@ -91,43 +92,53 @@ def main():
     questions = load_questions()
     print(f"✓ Loaded {len(questions)} questions")
     
-    # Login
-    print("\nLogging in...")
-    token = login(RENDER_URL, SCHOOL_CODE, HOD_EMAIL, HOD_PASSWORD)
-    if not token:
-        print("✗ Login failed. Check credentials.")
-        sys.exit(1)
-    print("✓ Login successful")
+    # Login, unless an earlier run left a token that is still valid
+    creds = {"schoolCode": SCHOOL_CODE, "email": HOD_EMAIL, "password": HOD_PASSWORD}
+    auth = AuthToken(RENDER_URL, creds, functools.partial(login, RENDER_URL))
+    if auth.token:
+        print("\n✓ Reusing cached login")
+    else:
+        print("\nLogging in...")
+        if not auth.renew():
+            print("✗ Login failed. Check credentials.")
+            sys.exit(1)
+        print("✓ Login successful")
     
     # Upload in batches
     print(f"\nUploading in batches of {BATCH_SIZE}...")
     
     total_uploaded = 0
     failed_batches = []
+    batches = [questions[i:i+BATCH_SIZE] for i in range(0, len(questions), BATCH_SIZE)]
+    total_batches = len(batches)
+    limiter = RateLimiter()
     
-    for i in range(0, len(questions), BATCH_SIZE):
-        batch = questions[i:i+BATCH_SIZE]
-        batch_num = (i // BATCH_SIZE) + 1
-        total_batches = (len(questions) + BATCH_SIZE - 1) // BATCH_SIZE
-        
-        print(f"  Batch {batch_num}/{total_batches} ({len(batch)} questions)...", end=" ")
-        
-        try:
-            response = upload_batch(RENDER_URL, token, batch)
-            if response.status_code == 200:
-                result = response.json()
-                count = result.get("count", len(batch))
-                total_uploaded += count
-                print(f"✓ {count} uploaded")
-            else:
-                print(f"✗ Error: {response.text[:100]}")
+    def send(batch, token):
+        # Spaced starts replace the old sleep between batches; uploads overlap
+        limiter.wait()
+        return upload_batch(RENDER_URL, token, batch)
+    
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        futures = {executor.submit(auth.send, send, batch): batch_num for batch_num, batch in enumerate(batches, 1)}
+        for future in as_completed(futures):
+            batch_num = futures[future]
+            batch = batches[batch_num - 1]
+            status = f"  Batch {batch_num}/{total_batches} ({len(batch)} questions)..."
+            try:
+                response = future.result()
+                if response.status_code == 200:
+                    result = response.json()
+                    count = result.get("count", len(batch))
+                    total_uploaded += count
+                    print(f"{status} ✓ {count} uploaded")
+                else:
+                    print(f"{status} ✗ Error: {response.text[:100]}")
+                    failed_batches.append(batch_num)
+            except Exception as e:
+                print(f"{status} ✗ Exception: {e}")
                 failed_batches.append(batch_num)
-        except Exception as e:
-            print(f"✗ Exception: {e}")
-            failed_batches.append(batch_num)
-        
-        # Small delay to avoid rate limiting
-        time.sleep(0.5)
+    
+    failed_batches.sort()
     
     # Summary
     print("\n" + "=" * 60)
@@ -4,10 +4,12 @@ Complete Setup and Question Upload Script for Render
 Creates school, wing, users, and uploads all questions
 """
 
+import gzip
 import json
-import requests
-import time
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from upload_common import SESSION, AuthToken, RateLimiter, dumps_json
 
 # Configuration
 RENDER_URL = "https://question-bank-y6wx.onrender.com"
@@ -43,42 +45,56 @@ USERS = [
 ]
 
 BATCH_SIZE = 50
+UPLOAD_WORKERS = 8  # Requests in flight at once
 
-def api_call(method, endpoint, token=None, data=None):
-    """Make API call"""
+def api_call(method, endpoint, token=None, data=None, compress=False):
+    """Make API call; compress gzips the JSON body, which express.json() inflates"""
     url = f"{RENDER_URL}{endpoint}"
     headers = {"Content-Type": "application/json"}
     if token:
         headers["Authorization"] = f"Bearer {token}"
+    body = dumps_json(data)
+    if compress:
+        body = gzip.compress(body, compresslevel=3)
+        headers["Content-Encoding"] = "gzip"
     
     try:
         if method == "GET":
-            resp = requests.get(url, headers=headers, timeout=30)
+            resp = SESSION.get(url, headers=headers, timeout=30)
         elif method == "POST":
-            resp = requests.post(url, json=data, headers=headers, timeout=60)
+            resp = SESSION.post(url, data=body, headers=headers, timeout=60)
         return resp
     except Exception as e:
         print(f"Error: {e}")
         return None
 
+def login(creds):
+    """Login and return the response body (token and expiresAt)"""
+    resp = api_call("POST", "/api/auth/login", data=creds)
+    if not resp or resp.status_code != 200:
+        print(f"   ✗ Login failed: {resp.text if resp else 'No response'}")
+        return None
+    return resp.json()
+
 def main():
     print("=" * 60)
     print("COMPLETE SETUP & QUESTION UPLOAD")
     print("=" * 60)
     print(f"Target: {RENDER_URL}\n")
     
-    # Step 1: Login as Super Admin
+    # Step 1: Login as Super Admin, unless an earlier run left a valid token
     print("1. Logging in as Super Admin...")
-    resp = api_call("POST", "/api/auth/login", data=SUPER_ADMIN)
-    if not resp or resp.status_code != 200:
-        print(f"   ✗ Login failed: {resp.text if resp else 'No response'}")
+    admin = AuthToken(RENDER_URL, SUPER_ADMIN, login)
+    if admin.token:
+        print("   ✓ Reusing cached login")
+    elif admin.renew():
+        print("   ✓ Logged in successfully")
+    else:
         sys.exit(1)
-    token = resp.json()["token"]
-    print("   ✓ Logged in successfully")
     
     # Step 2: Create/Get School
     print("\n2. Creating school...")
-    resp = api_call("POST", "/api/tenants", token, SCHOOL)
+    resp = admin.send(api_call, "POST", "/api/tenants", data=SCHOOL)
     if resp and resp.status_code == 200:
         tenant = resp.json()
         tenant_id = tenant["id"]
@@ -86,7 +102,7 @@ def main():
         print(f"   ✓ School Code: {tenant['code']}")
     elif resp and "already exists" in resp.text.lower():
         print("   ℹ School already exists, fetching...")
-        resp = api_call("GET", "/api/tenants", token)
+        resp = admin.send(api_call, "GET", "/api/tenants")
         if resp and resp.status_code == 200:
             tenants = resp.json()
             tenant = next((t for t in tenants if t["code"] == SCHOOL["code"]), None)
@@ -109,7 +125,7 @@ def main():
         "grades": ["11", "12"],
         "isActive": True
     }
-    resp = api_call("POST", "/api/superadmin/wings", token, wing_data)
+    resp = admin.send(api_call, "POST", "/api/superadmin/wings", data=wing_data)
     if resp and resp.status_code == 200:
         wing = resp.json()
         wing_id = wing["id"]
@@ -123,9 +139,16 @@ def main():
     
     # Step 4: Create Users
     print("\n4. Creating users...")
-    for user in USERS:
-        user_data = {**user, "tenantId": tenant_id, "active": True}
-        resp = api_call("POST", "/api/users", token, user_data)
+    limiter = RateLimiter()
+    
+    def create_user(user):
+        limiter.wait()
+        return admin.send(api_call, "POST", "/api/users", data={**user, "tenantId": tenant_id, "active": True})
+    
+    # Created concurrently, reported in USERS order
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        user_responses = list(executor.map(create_user, USERS))
+    for user, resp in zip(USERS, user_responses):
         if resp and resp.status_code == 200:
             print(f"   ✓ Created: {user['name']} ({user['role']})")
         elif resp and "exists" in resp.text.lower():
@@ -140,14 +163,15 @@ def main():
         "email": "hod.cs@mvmchennai.edu.in",
         "password": "HodCS@123"
     }
-    resp = api_call("POST", "/api/auth/login", data=hod_creds)
-    if not resp or resp.status_code != 200:
+    hod = AuthToken(RENDER_URL, hod_creds, login)
+    if hod.token or hod.renew():
+        uploader = hod
+        print("   ✓ Logged in as HOD")
+    else:
         print(f"   ✗ HOD login failed, trying with Super Admin token...")
         # Continue with super admin token but we need tenant context
         # This might not work for tenant-scoped operations
-    else:
-        token = resp.json()["token"]
-        print("   ✓ Logged in as HOD")
+        uploader = admin
     
     # Step 6: Load and upload questions
     print("\n6. Loading questions from JSON...")
@@ -162,12 +186,10 @@ def main():
     
     print(f"\n7. Uploading questions in batches of {BATCH_SIZE}...")
     total_uploaded = 0
+    batches = [questions[i:i+BATCH_SIZE] for i in range(0, len(questions), BATCH_SIZE)]
+    total_batches = len(batches)
     
-    for i in range(0, len(questions), BATCH_SIZE):
-        batch = questions[i:i+BATCH_SIZE]
-        batch_num = (i // BATCH_SIZE) + 1
-        total_batches = (len(questions) + BATCH_SIZE - 1) // BATCH_SIZE
-        
+    def upload_batch(batch):
         # Format for API
         formatted = [{
             "questionText": q["questionText"],
@@ -183,17 +205,22 @@ def main():
             "status": "draft",
         } for q in batch]
         
-        print(f"   Batch {batch_num}/{total_batches}...", end=" ")
-        
-        resp = api_call("POST", "/api/questions/bulk", token, {"questions": formatted})
-        if resp and resp.status_code == 200:
-            count = resp.json().get("count", len(batch))
-            total_uploaded += count
-            print(f"✓ {count}")
-        else:
-            print(f"✗ {resp.text[:50] if resp else 'Failed'}")
-        
-        time.sleep(0.3)
+        # Spaced starts replace the old sleep between batches; uploads overlap
+        limiter.wait()
+        return uploader.send(api_call, "POST", "/api/questions/bulk", data={"questions": formatted}, compress=True)
+    
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        futures = {executor.submit(upload_batch, batch): batch_num for batch_num, batch in enumerate(batches, 1)}
+        for future in as_completed(futures):
+            batch_num = futures[future]
+            batch = batches[batch_num - 1]
+            resp = future.result()
+            if resp and resp.status_code == 200:
+                count = resp.json().get("count", len(batch))
+                total_uploaded += count
+                print(f"   Batch {batch_num}/{total_batches}... ✓ {count}")
+            else:
+                print(f"   Batch {batch_num}/{total_batches}... ✗ {resp.text[:50] if resp else 'Failed'}")
     
     # Summary
     print("\n" + "=" * 60)